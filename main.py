@@ -1,4 +1,7 @@
 import os
+import time
+_startup_started = time.perf_counter()
+
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
@@ -7,10 +10,18 @@ from fastapi.templating import Jinja2Templates
 from fastapi import Request
 
 from src.database import engine, Base
+from src.migrations import run_migrations
 from src.api import auth_routes, exam_routes, admin_routes, report_routes, user_routes
+from src.services.transcription_service import transcription_queue
+from src.services.answer_buffer import answer_buffer
+from src.services.password_service import password_hasher
+from src.services.stt_pool import parallel_transcriber
+from src.services.ai_service import model_registry, AI_WORKER_MODE, WHISPER_MODEL_NAME
 
 # Create Database Tables
 Base.metadata.create_all(bind=engine)
+# Bring existing tables up to the models (a failed step stops the worker from starting)
+run_migrations(engine)
 
 # Initialize FastAPI Application
 app = FastAPI(title="AI Assessment System")
@@ -35,10 +46,30 @@ app.add_middleware(
 # Register API Routes
 app.include_router(auth_routes.router, prefix="/api/auth", tags=["Auth"])
 app.include_router(exam_routes.router, prefix="/api/exam", tags=["Exam"])
+# API-only workers (AI_WORKER_MODE=off) leave the AI routes to the inference workers
+if AI_WORKER_MODE != "off":
+    app.include_router(exam_routes.ai_router, prefix="/api/exam", tags=["Exam"])
 app.include_router(admin_routes.router, prefix="/api/admin", tags=["Admin"])
 app.include_router(report_routes.router, prefix="/api/report", tags=["Report"])
 app.include_router(user_routes.router)
 
+# Worker Startup (AI preload + import-time report)
+@app.on_event("startup")
+def report_startup():
+    if AI_WORKER_MODE == "preload":
+        model_registry.preload()
+        parallel_transcriber.warm(WHISPER_MODEL_NAME)
+    model_registry.startup_seconds = round(time.perf_counter() - _startup_started, 3)
+    print(f"🚀 Worker ready in {model_registry.startup_seconds}s (AI mode: {AI_WORKER_MODE}, imports: {model_registry.import_times})")
+
+# Background Workers Shutdown
+@app.on_event("shutdown")
+def shutdown_background_workers():
+    answer_buffer.stop()
+    transcription_queue.shutdown()
+    password_hasher.shutdown()
+    parallel_transcriber.shutdown()
+
 # HTML Page Routes
 
 @app.get("/")
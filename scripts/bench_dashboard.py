@@ -0,0 +1,60 @@
+"""
+Concurrent load on the dashboard endpoint, to compare two builds or settings
+against the same database.
+
+    # terminal 1 (e.g. before/after the change)
+    uvicorn main:app --port 8000
+    # terminal 2
+    python scripts/bench_dashboard.py --user-id 1 --requests 2000 --concurrency 200
+
+Needs httpx (pip install httpx). Reports throughput and latency percentiles.
+"""
+import time
+import asyncio
+import argparse
+
+import httpx
+
+
+def summary(label: str, latencies: list, statuses: dict, elapsed: float) -> str:
+    latencies = sorted(latencies)
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0.0
+    return (f"{label}: {len(latencies)} requests in {elapsed:.2f}s = {len(latencies) / elapsed:.1f} req/s | "
+            f"p50 {pct(0.50):.1f} ms, p95 {pct(0.95):.1f} ms, p99 {pct(0.99):.1f} ms | status {statuses}")
+
+
+async def run(url: str, user_id: int, requests: int, concurrency: int):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        # One warm-up request: pools, lazy imports and the stats row are built outside the measurement
+        (await client.get(f"/api/report/dashboard/{user_id}")).raise_for_status()
+
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        statuses = {}
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    status = (await client.get(f"/api/report/dashboard/{user_id}")).status_code
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        return latencies, statuses, time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+
+    latencies, statuses, elapsed = asyncio.run(run(args.url, args.user_id, args.requests, args.concurrency))
+    print(summary(f"GET /api/report/dashboard (concurrency {args.concurrency})", latencies, statuses, elapsed))
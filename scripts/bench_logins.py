@@ -0,0 +1,81 @@
+"""
+Concurrent logins against a running server, with a light request (profile)
+measured at the same time, so both login throughput and how much the bcrypt
+work slows down everything else are visible.
+
+    # terminal 1 (e.g. HASH_WORKERS=1 vs the default, or before/after the change)
+    uvicorn main:app --port 8000
+    # terminal 2
+    python scripts/bench_logins.py --logins 400 --concurrency 100
+
+The benchmark user is registered on the first run. Needs httpx (pip install httpx).
+"""
+import time
+import asyncio
+import argparse
+
+import httpx
+
+
+def summary(label: str, latencies: list, statuses: dict, elapsed: float) -> str:
+    latencies = sorted(latencies)
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0.0
+    return (f"{label}: {len(latencies)} requests in {elapsed:.2f}s = {len(latencies) / elapsed:.1f} req/s | "
+            f"p50 {pct(0.50):.1f} ms, p95 {pct(0.95):.1f} ms, p99 {pct(0.99):.1f} ms | status {statuses}")
+
+
+async def timed(client, method: str, path: str, latencies: list, statuses: dict, **kwargs):
+    start = time.perf_counter()
+    try:
+        status = (await client.request(method, path, **kwargs)).status_code
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    latencies.append(time.perf_counter() - start)
+    statuses[status] = statuses.get(status, 0) + 1
+
+
+async def run(args):
+    credentials = {"email": args.email, "password": args.password}
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=120) as client:
+        response = await client.post("/api/auth/login", json=credentials)
+        if response.status_code != 200:
+            register = await client.post("/api/auth/register", json={"username": "bench", **credentials})
+            register.raise_for_status()
+            response = await client.post("/api/auth/login", json=credentials)
+        response.raise_for_status()
+        user_id = response.json()["user_id"]
+
+        login_latencies, login_statuses = [], {}
+        probe_latencies, probe_statuses = [], {}
+        semaphore = asyncio.Semaphore(args.concurrency)
+        done = asyncio.Event()
+
+        async def login():
+            async with semaphore:
+                await timed(client, "POST", "/api/auth/login", login_latencies, login_statuses, json=credentials)
+
+        async def probe():
+            # One profile request at a time while the logins run
+            while not done.is_set():
+                await timed(client, "GET", f"/api/auth/profile/{user_id}", probe_latencies, probe_statuses)
+
+        started = time.perf_counter()
+        prober = asyncio.create_task(probe())
+        await asyncio.gather(*(login() for _ in range(args.logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await prober
+
+    print(summary(f"POST /api/auth/login (concurrency {args.concurrency})", login_latencies, login_statuses, elapsed))
+    print(summary("GET /api/auth/profile during the logins", probe_latencies, probe_statuses, elapsed))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--email", default="bench@example.com")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--logins", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=100)
+    asyncio.run(run(parser.parse_args()))
@@ -1,4 +0,0 @@
-from .user import User, Student, Administrator, LevelRecord
-from .exam import Question, QuestionOption, ExamSession, Answer
-from .report import FeedbackReport, ErrorReport
-from .security import SecurityPolicy, SecurityLog
@@ -1,12 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Any
+from typing import List, Any, Optional
+from datetime import datetime
 
 from src.database import get_db
 from src.services.admin_service import AdminService
 from src.services.security_service import SecurityService
+from src.services import ai_service
+from src.services.stt_pool import parallel_transcriber
+from src.repositories.question_pool import question_pool_cache
+from src.services.answer_buffer import answer_buffer
+from src.services.export_service import stream_export
+from src.services.password_service import password_hasher
 from src.schemas.exam import QuestionCreate, ScoreOverride
 from src.schemas.report import ThreatLogCreate
+from src.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter()
 
@@ -17,20 +26,34 @@ def add_question(q: QuestionCreate, db: Session = Depends(get_db)):
     return service.manage_question_pool(q)
 
 @router.get("/questions")
-def list_questions(db: Session = Depends(get_db)):
-    """Lists all questions."""
+def list_questions(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    skill: Optional[str] = None,
+    level: Optional[str] = None,
+    type: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Lists questions page by page (filter: skill, level, type)."""
     service = AdminService(db)
-    questions = service.get_all_questions()
-    return [
-        {
-            "question_id": q.question_id,
-            "text": q.text,
-            "type": q.type,
-            "difficulty": q.difficulty,
-            "skill_category": q.skill_category
-        }
-        for q in questions
-    ]
+    questions, next_cursor, total = service.list_questions(
+        limit, cursor, descending=(order == "desc"), skill=skill, level=level, type=type
+    )
+    return {
+        "items": [
+            {
+                "question_id": q.question_id,
+                "text": q.text,
+                "type": q.type,
+                "difficulty": q.difficulty,
+                "skill_category": q.skill_category
+            }
+            for q in questions
+        ],
+        "next_cursor": next_cursor,
+        "total": total
+    }
 
 @router.delete("/question/{question_id}")
 def delete_question(question_id: int, db: Session = Depends(get_db)):
@@ -42,21 +65,38 @@ def delete_question(question_id: int, db: Session = Depends(get_db)):
     return {"status": "deleted", "msg": "Question deleted."}
 
 @router.get("/users")
-def list_users(db: Session = Depends(get_db)):
-    """Lists all users."""
+def list_users(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = Query("user_id", pattern="^(user_id|username)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    joined_from: Optional[datetime] = None,
+    joined_to: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """Lists users page by page (filter: role, status, join date range)."""
     service = AdminService(db)
-    users = service.get_all_users()
-    return [
-        {
-            "user_id": u.user_id,
-            "username": u.username,
-            "email": u.email,
-            "role": u.role,
-            "is_active": u.is_active,
-            "joined_at": u.created_at.strftime("%Y-%m-%d") if u.created_at else "-"
-        }
-        for u in users
-    ]
+    users, next_cursor, total = service.list_users(
+        limit, cursor, sort=sort, descending=(order == "desc"),
+        role=role, is_active=is_active, joined_from=joined_from, joined_to=joined_to
+    )
+    return {
+        "items": [
+            {
+                "user_id": u.user_id,
+                "username": u.username,
+                "email": u.email,
+                "role": u.role,
+                "is_active": u.is_active,
+                "joined_at": u.created_at.strftime("%Y-%m-%d") if u.created_at else "-"
+            }
+            for u in users
+        ],
+        "next_cursor": next_cursor,
+        "total": total
+    }
 
 @router.post("/user/{user_id}/toggle-status")
 def toggle_user_status(user_id: int, db: Session = Depends(get_db)):
@@ -80,22 +120,58 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
     return {"status": "deleted", "msg": f"User {user_id} deleted."}
 
 @router.get("/sessions")
-def list_exam_sessions(db: Session = Depends(get_db)):
+def list_exam_sessions(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = Query("end_time", pattern="^(end_time|overall_score)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    status: Optional[str] = "COMPLETED",
+    level: Optional[str] = None,
+    student_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """Lists exam sessions page by page (filter: status, level, student, date range)."""
     service = AdminService(db)
-    data = service.get_all_exam_sessions()
+    data, next_cursor, total = service.list_exam_sessions(
+        limit, cursor, sort=sort, descending=(order == "desc"), status=status,
+        level=level, student_id=student_id, date_from=date_from, date_to=date_to
+    )
     
-    return [
-        {
-            "session_id": s.session_id,
-            "student_id": s.student_id,
-            "student_name": username if username else "Unknown",
-            "score": s.overall_score,
-            "level": s.detected_level,
-            "date": s.end_time if s.end_time else s.start_time,
-            "status": s.status
-        }
-        for s, username in data
-    ]
+    return {
+        "items": [
+            {
+                "session_id": s.session_id,
+                "student_id": s.student_id,
+                "student_name": s.username if s.username else "Unknown",
+                "score": s.overall_score,
+                "level": s.detected_level,
+                "date": s.end_time if s.end_time else s.start_time,
+                "status": s.status
+            }
+            for s in data
+        ],
+        "next_cursor": next_cursor,
+        "total": total
+    }
+
+@router.get("/export")
+def export_results(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    skill: Optional[str] = None,
+    status: Optional[str] = "COMPLETED"
+):
+    """Streams every matching session with its answers (one row per answer) as CSV or NDJSON."""
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    filename = f"exam_results_{datetime.now():%Y%m%d_%H%M%S}.{format}"
+    return StreamingResponse(
+        stream_export(format, date_from=date_from, date_to=date_to, skill=skill, status=status),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 @router.post("/score-override")
 def override_score(data: ScoreOverride, db: Session = Depends(get_db)):
@@ -118,22 +194,36 @@ def log_threat(log: ThreatLogCreate, db: Session = Depends(get_db)):
     return {"status": "logged"}
 
 @router.get("/reports")
-def list_reports(db: Session = Depends(get_db)):
-    """FR-20: Lists all error reports."""
+def list_reports(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    issue_type: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """FR-20: Lists error reports page by page (filter: issue type, date range)."""
     service = AdminService(db)
-    reports = service.get_all_reports()
+    reports, next_cursor, total = service.list_reports(
+        limit, cursor, descending=(order == "desc"), issue_type=issue_type, date_from=date_from, date_to=date_to
+    )
     
     # Formatting for frontend table
-    return [
-        {
-            "report_id": r.report_id,
-            "student_name": username if username else "Unknown",
-            "issue_type": r.issue_type,
-            "description": r.description,
-            "created_at": r.created_at.strftime("%Y-%m-%d %H:%M") if r.created_at else "-"
-        }
-        for r, username in reports
-    ]
+    return {
+        "items": [
+            {
+                "report_id": r.report_id,
+                "student_name": r.username if r.username else "Unknown",
+                "issue_type": r.issue_type,
+                "description": r.description,
+                "created_at": r.created_at.strftime("%Y-%m-%d %H:%M") if r.created_at else "-"
+            }
+            for r in reports
+        ],
+        "next_cursor": next_cursor,
+        "total": total
+    }
 
 @router.delete("/report/{report_id}")
 def resolve_report(report_id: int, db: Session = Depends(get_db)):
@@ -142,4 +232,32 @@ def resolve_report(report_id: int, db: Session = Depends(get_db)):
     success = service.resolve_report(report_id)
     if not success:
         raise HTTPException(status_code=404, detail="Report not found")
-    return {"status": "resolved", "msg": "Issue resolved."}
\ No newline at end of file
+    return {"status": "resolved", "msg": "Issue resolved."}
+
+@router.get("/ai-status")
+def ai_status():
+    """Shows which AI models this worker has loaded, their load times and memory."""
+    status = ai_service.model_registry.stats()
+    status["evaluation_cache"] = ai_service.evaluation_cache.stats()
+    status["transcript_cache"] = ai_service.transcript_cache.stats()
+    status["parallel_stt"] = parallel_transcriber.stats()
+    status["gemini_circuit"] = ai_service.gemini_breaker.stats()
+    status["gemini_deadline_skips"] = ai_service.gemini_deadline_skips
+    status["question_pool"] = question_pool_cache.stats()
+    return status
+
+@router.post("/ai-cache/clear")
+def clear_ai_cache():
+    """Drops all cached AI evaluations (e.g. after changing the grading prompt)."""
+    ai_service.evaluation_cache.invalidate()
+    return {"status": "cleared", "msg": "AI evaluation cache cleared."}
+
+@router.get("/password-hasher")
+def password_hasher_status():
+    """Dedicated bcrypt executor of this worker (queue depth, rejected logins)."""
+    return password_hasher.stats()
+
+@router.get("/answer-buffer")
+def answer_buffer_status():
+    """Buffered vs flushed autosave writes of this worker."""
+    return answer_buffer.stats()
@@ -7,12 +7,12 @@ from src.schemas.auth import UserCreate, UserLogin, UserUpdate # UserUpdate ekle
 router = APIRouter()
 
 @router.post("/register")
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: Session = Depends(get_db)):
     """
     FR-1: Öğrenci kaydı oluşturur.
     """
     service = AccountService(db)
-    new_student = service.create_account(user)
+    new_student = await service.create_account_async(user)
     
     return {
         "message": "Registration Successful", 
@@ -21,12 +21,12 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     }
 
 @router.post("/login")
-def login(user: UserLogin, db: Session = Depends(get_db)):
+async def login(user: UserLogin, db: Session = Depends(get_db)):
     """
     FR-1: Giriş yapar.
     """
     service = AccountService(db)
-    u = service.login(user)
+    u = await service.login_async(user)
     
     # Redirection Logic
     redirect_url = "/dashboard.html"
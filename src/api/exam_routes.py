@@ -5,17 +5,21 @@ from src.services.exam_service import ExamService
 
 from src.schemas.exam import AnswerCreate, ExamSubmit, ReportOut, WritingInput, WritingFeedback
 
-from src.services.ai_service import AIModule
+from src.services.ai_service import get_ai_module
+from src.services.transcription_service import transcription_queue
+from src.services.audio_storage import audio_storage
 from typing import List
 from datetime import datetime
 
 router = APIRouter()
+# Routes that need the AI stack (Gemini / Whisper / spaCy); not mounted when AI_WORKER_MODE=off
+ai_router = APIRouter()
 
-@router.post("/evaluate/writing", response_model=WritingFeedback)
-async def evaluate_writing_endpoint(data: WritingInput):
+@ai_router.post("/evaluate/writing", response_model=WritingFeedback)
+def evaluate_writing_endpoint(data: WritingInput):
     
-    ai_module = AIModule() # Modülü başlat
-    result = ai_module.evaluate_writing_with_gemini(data.text, data.topic, data.level)
+    ai_module = get_ai_module() # Paylaşılan modül
+    result = ai_module.evaluate_writing_hybrid(data.text, data.topic, data.level)
     return result
 
 @router.get("/start")
@@ -55,23 +59,45 @@ def submit_answer(ans: AnswerCreate, session_id: int, db: Session = Depends(get_
     )
     return {"status": "saved"}
 
-@router.post("/upload-audio")
+@ai_router.post("/upload-audio")
 def upload_audio(file: UploadFile = File(...), db: Session = Depends(get_db)):
     service = ExamService(db)
     filename = service.save_audio(file)
     return {"filename": filename}
 
-@router.post("/submit", response_model=ReportOut)
+# Resumable upload: start -> PUT chunks at increasing offsets -> complete
+@ai_router.post("/upload-audio/start")
+def start_audio_upload():
+    return {
+        "upload_id": audio_storage.start_upload(),
+        "chunk_size": audio_storage.chunk_bytes,
+        "max_bytes": audio_storage.max_bytes
+    }
+
+@ai_router.get("/upload-audio/{upload_id}")
+def audio_upload_status(upload_id: str):
+    """Bytes already received; a client that lost its connection resumes from this offset."""
+    return {"upload_id": upload_id, "offset": audio_storage.upload_offset(upload_id)}
+
+@ai_router.put("/upload-audio/{upload_id}")
+def upload_audio_chunk(upload_id: str, offset: int = Query(..., ge=0), file: UploadFile = File(...)):
+    return {"upload_id": upload_id, "offset": audio_storage.append_chunk(upload_id, offset, file.file)}
+
+@ai_router.post("/upload-audio/{upload_id}/complete")
+def complete_audio_upload(upload_id: str, filename: str = None, db: Session = Depends(get_db)):
+    service = ExamService(db)
+    return {"filename": service.complete_audio_upload(upload_id, filename)}
+
+@ai_router.get("/transcription-status")
+def transcription_status(filename: str = None):
+    """Background speech-to-text state for a recording and the current queue depth."""
+    return transcription_queue.status(filename)
+
+@ai_router.post("/submit", response_model=ReportOut)
 def finalize_exam(payload: ExamSubmit, db: Session = Depends(get_db)):
     service = ExamService(db)
     
-    if payload.answers:
-        for ans in payload.answers:
-            service.save_answer(
-                session_id=payload.session_id,
-                question_id=ans.question_id,
-                selected_option_id=ans.selected_option_id,
-                text_response=ans.text_response
-            )
-            
+    # Tüm cevaplar tek sorgu + tek transaction ile kaydedilir
+    service.save_answers(payload.session_id, payload.answers)
+
     return service.finalize_exam(payload.session_id, skill_name=payload.skill)
\ No newline at end of file
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
 from src.database import get_db
@@ -8,6 +9,10 @@ from src.models.user import User, LevelRecord
 
 from src.schemas.report import ErrorReportCreate
 from src.services.error_service import ErrorReportService
+from src.services.report_service import ReportService
+from src.repositories.stats_repo import StudentStatsRepository
+from src.repositories.exam_repo import ExamRepository
+from src.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from src.utils.error_handler import check_found
 
 router = APIRouter()
@@ -25,15 +30,10 @@ def get_dashboard_stats(user_id: int, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.user_id == user_id).first()
     check_found(user, "User")
 
-    completed_count = db.query(ExamSession).filter(
-        ExamSession.student_id == user_id,
-        ExamSession.status == "COMPLETED"
-    ).count()
-
-    avg_score = db.query(func.avg(ExamSession.overall_score)).filter(
-        ExamSession.student_id == user_id,
-        ExamSession.status == "COMPLETED"
-    ).scalar() or 0.0
+    # Sayım / ortalama her istekte hesaplanmaz, öğrenci istatistik satırından okunur
+    stats = StudentStatsRepository(db).get_or_rebuild(user_id)
+    completed_count = stats.completed_count if stats else 0
+    avg_score = stats.average_score if stats else 0.0
 
     level_record = db.query(LevelRecord).filter(LevelRecord.student_id == user_id).first()
     overall_level = level_record.overall_level if level_record else "A1"
@@ -45,23 +45,29 @@ def get_dashboard_stats(user_id: int, db: Session = Depends(get_db)):
         "overall_level": overall_level
     }
 
-# Sınav Geçmişi
+# Sınav Geçmişi (cursor ile sayfalı, yalnızca listede gösterilen kolonlar)
 @router.get("/history/{user_id}")
-def get_user_history(user_id: int, db: Session = Depends(get_db)):
-    sessions = db.query(ExamSession).filter(
-        ExamSession.student_id == user_id
-    ).order_by(ExamSession.start_time.desc()).all()
+def get_user_history(
+    user_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    page, next_cursor = ExamRepository(db).get_history_page(user_id, limit, cursor)
 
-    return [
-        {
-            "id": s.session_id,
-            "start_time": s.start_time,
-            "detected_level": s.detected_level,
-            "overall_score": s.overall_score,
-            "status": s.status
-        }
-        for s in sessions
-    ]
+    return {
+        "items": [
+            {
+                "id": s.session_id,
+                "start_time": s.start_time,
+                "detected_level": s.detected_level,
+                "overall_score": s.overall_score,
+                "status": s.status
+            }
+            for s in page
+        ],
+        "next_cursor": next_cursor
+    }
 
 # Detaylı Sınav Raporu
 @router.get("/detail/{session_id}")
@@ -69,60 +75,17 @@ def get_exam_detail(session_id: int, db: Session = Depends(get_db)):
     """
     Bu fonksiyon, frontend'deki analysis.html sayfası ile uyumlu olacak şekilde sınav detaylarını hazırlar.
     """
+    # Sonuçlandırmada kaydedilen hazır rapor (tek satır okuma)
+    service = ReportService(db)
+    details = service.get_detail(session_id)
+    if details:
+        return details
+
     session = db.query(ExamSession).filter(ExamSession.session_id == session_id).first()
     check_found(session, "Exam session")
 
     if session.status not in ["COMPLETED", "EXPIRED"]:
         raise HTTPException(status_code=403, detail="This exam is not completed yet.")
 
-    # Sınav oturumundaki tüm cevapları veritabanından çek
-    answers = db.query(Answer).options(
-        joinedload(Answer.question).joinedload(Question.options)
-    ).filter(Answer.session_id == session_id).all()
-
-    questions_data = []
-    correct_count = 0
-    wrong_count = 0
-
-    for ans in answers:
-        question = ans.question
-        user_answer_text = "No answer"
-        
-        if ans.selected_option_id:
-            selected_opt = next((opt for opt in question.options if opt.option_id == ans.selected_option_id), None)
-            if selected_opt: user_answer_text = selected_opt.content
-        else:
-            # Hem 'content' hem 'text_response' alanlarını kontrol et
-            user_answer_text = getattr(ans, 'content', None) or getattr(ans, 'text_response', None) or "No answer"
-        
-        # Doğru cevabı belirle
-        correct_opt = next((opt for opt in question.options if opt.is_correct), None)
-        correct_answer_text = correct_opt.content if correct_opt else "AI Evaluation"
-
-        # İstatistikleri güncelle
-        if ans.is_correct: correct_count += 1
-        else: wrong_count += 1
-
-        questions_data.append({
-            "question_text": question.text,
-            "user_answer": user_answer_text,
-            "correct_answer": correct_answer_text,
-            "is_correct": ans.is_correct if ans.is_correct is not None else False
-        })
-
-    # Sabit metin yerine veritabanındaki AI geri bildirimini kullan
-    feedback_text = getattr(session, 'ai_feedback', None)
-    
-    # Eski sınavlar için AI analizi mevcut değilse
-    if not feedback_text:
-        feedback_text = "This exam is old, so AI analysis is not available. You can see the analysis by taking a new exam."
-
-    return {
-        "date": session.end_time if session.end_time else session.last_activity,
-        "score": session.overall_score,
-        "level": session.detected_level,
-        "correct_count": correct_count,
-        "wrong_count": wrong_count,
-        "ai_feedback": feedback_text,
-        "questions": questions_data
-    }
\ No newline at end of file
+    # Rapor kaydı olmayan eski sınavlar: GET içinde yazılmaz, anlık hazırlanır (kalıcı kayıt: backfill)
+    return service.render_detail(session)
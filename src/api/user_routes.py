@@ -6,6 +6,7 @@ from src.database import get_db
 # DÜZELTME 1: User modelini de import ediyoruz
 from src.models.user import User, Student, LevelRecord
 from src.models.exam import ExamSession 
+from src.repositories.stats_repo import StudentStatsRepository
 
 router = APIRouter(prefix="/api/user", tags=["User"])
 
@@ -55,22 +56,16 @@ def get_user_profile(user_id: int, db: Session = Depends(get_db)):
         if record.speaking_level: completed_skills.append("speaking")
     # --------------------------------------------------------
 
-    # İstatistikler (Sayı ve Ortalama)
-    exams = db.query(ExamSession).filter(
-        ExamSession.student_id == user_id,
-        ExamSession.status == "COMPLETED"
-    ).all()
-    
-    avg_score = 0
-    if exams:
-        total = sum([e.overall_score for e in exams])
-        avg_score = round(total / len(exams), 1)
+    # İstatistikler (Sayı ve Ortalama) - önceden hesaplanmış tek satır
+    stats = StudentStatsRepository(db).get_or_rebuild(user_id)
+    completed_exams = stats.completed_count if stats else 0
+    avg_score = stats.average_score if stats else 0.0
 
     return {
         "username": user.username,
         "email": user.email,
         "overall_level": current_level,
-        "completed_exams": len(exams),
+        "completed_exams": completed_exams,
         "average_score": avg_score,
         "completed_skills": completed_skills,
         "is_admin": False
@@ -93,6 +88,7 @@ def reset_user_cycle(user_id: int = Query(...), db: Session = Depends(get_db)):
     record.listening_level = None
     record.speaking_level = None
     # overall_level is not reset so user knows their last level
+    StudentStatsRepository(db).reset_cycle(user_id)
     
     db.commit()
      
@@ -0,0 +1,83 @@
+from sqlalchemy import inspect, text
+
+# Base.metadata.create_all only creates missing tables: columns, unique keys and
+# indexes added to an existing table are applied here. Every step checks the
+# live schema first, so running them again is a no-op.
+# Runs at startup (main.py, after create_all) and by hand: python -m src.migrations
+MIGRATIONS = []
+
+
+def migration(step):
+    MIGRATIONS.append(step)
+    return step
+
+
+def has_unique_key(conn, table: str, columns: list) -> bool:
+    """True if the table has a unique constraint or unique index on exactly these columns."""
+    inspector = inspect(conn)
+    wanted = set(columns)
+    keys = [set(uc["column_names"]) for uc in inspector.get_unique_constraints(table)]
+    keys += [set(ix["column_names"]) for ix in inspector.get_indexes(table) if ix.get("unique")]
+    return wanted in keys
+
+
+def dedupe(conn, table: str, id_column: str, key_columns: list) -> int:
+    """Keeps the newest row (highest id) of every key and deletes the rest. Returns deleted rows."""
+    keys = ", ".join(key_columns)
+    not_null = " AND ".join(f"{c} IS NOT NULL" for c in key_columns)
+    # The extra derived table lets MySQL delete from the table it reads
+    result = conn.execute(text(
+        f"DELETE FROM {table} WHERE {not_null} AND {id_column} NOT IN ("
+        f" SELECT keep_id FROM (SELECT MAX({id_column}) AS keep_id FROM {table} GROUP BY {keys}) AS keep)"
+    ))
+    return result.rowcount or 0
+
+
+@migration
+def answers_unique_session_question(conn):
+    """bulk_upsert_answers needs the key; without it every submit would insert duplicate answers."""
+    if has_unique_key(conn, "answers", ["session_id", "question_id"]):
+        return None
+    removed = dedupe(conn, "answers", "answer_id", ["session_id", "question_id"])
+    conn.execute(text("CREATE UNIQUE INDEX uq_answers_session_question ON answers (session_id, question_id)"))
+    return f"unique key added, {removed} duplicate answer(s) removed"
+
+
+
+@migration
+def feedback_reports_details(conn):
+    """Rendered detail page column; without it every FeedbackReport load fails."""
+    columns = {c["name"] for c in inspect(conn).get_columns("feedback_reports")}
+    if "details" in columns:
+        return None
+    conn.execute(text("ALTER TABLE feedback_reports ADD COLUMN details JSON NULL"))
+    return "details column added (old reports: python -m src.services.report_service)"
+
+
+@migration
+def feedback_reports_unique_session(conn):
+    """One report per session: save_report updates the row it finds."""
+    if has_unique_key(conn, "feedback_reports", ["session_id"]):
+        return None
+    removed = dedupe(conn, "feedback_reports", "report_id", ["session_id"])
+    conn.execute(text("CREATE UNIQUE INDEX uq_feedback_reports_session ON feedback_reports (session_id)"))
+    return f"unique key added, {removed} duplicate report(s) removed"
+
+
+def run_migrations(engine) -> list:
+    """Applies pending steps, each in its own transaction. Raises if a step fails."""
+    applied = []
+    for step in MIGRATIONS:
+        with engine.begin() as conn:
+            note = step(conn)
+        if note:
+            print(f"🛠️ Migration {step.__name__}: {note}")
+            applied.append(step.__name__)
+    return applied
+
+
+if __name__ == "__main__":
+    from src.database import engine
+
+    applied = run_migrations(engine)
+    print(f"✅ {len(applied)} migration(s) applied.")
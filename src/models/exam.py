@@ -1,10 +1,14 @@
 from src.database import Base 
-from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, Float, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, Float, DateTime, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 class Question(Base): 
     __tablename__ = "questions"
+    # Admin listing filters and the exam question pool (skill + level)
+    __table_args__ = (
+        Index("ix_questions_skill_difficulty", "skill_category", "difficulty", "question_id"),
+    )
 
     question_id = Column(Integer, primary_key=True, index=True)
     text = Column(Text, nullable=False)
@@ -28,9 +32,22 @@ class QuestionOption(Base):
     
     question = relationship("Question", back_populates="options")
 
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+
+    # Shared change counter for per-worker caches (e.g. "questions": bumped on every
+    # question/option change, so each worker reloads its question pool)
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
 
 class ExamSession(Base): 
     __tablename__ = "exam_sessions" 
+    # Keyset pagination of a student's history (student_id, start_time DESC, session_id DESC)
+    __table_args__ = (
+        Index("ix_exam_sessions_student_start", "student_id", "start_time", "session_id"),
+        # Admin listing (status filter, newest first)
+        Index("ix_exam_sessions_status_end", "status", "end_time", "session_id"),
+    )
 
     session_id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.user_id"))
@@ -53,6 +70,10 @@ class ExamSession(Base):
 
 class Answer(Base): 
     __tablename__ = "answers" 
+    # One answer per question in a session (target of the bulk upsert)
+    __table_args__ = (
+        UniqueConstraint("session_id", "question_id", name="uq_answers_session_question"),
+    )
 
     answer_id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("exam_sessions.session_id"))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Float, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Float, DateTime, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from src.database import Base
@@ -7,18 +7,25 @@ class FeedbackReport(Base):
     __tablename__ = "feedback_reports"
 
     report_id = Column(Integer, primary_key=True, index=True)
-    session_id = Column(Integer, ForeignKey("exam_sessions.session_id"))
+    # One report per session (written by finalize / score override)
+    session_id = Column(Integer, ForeignKey("exam_sessions.session_id"), unique=True)
     
     # FR-11 & Analysis Use Case: Detailed feedback coming from the AI Module
     recommendations = Column(Text)
     overall_score = Column(Float)
     score_breakdown = Column(JSON) # {reading: 80, writing: 70...}
+    # Rendered detail page (per-question results, counts, feedback) served as-is
+    details = Column(JSON, nullable=True)
     generated_at = Column(DateTime(timezone=True), server_default=func.now())
 
     session = relationship("src.models.exam.ExamSession", back_populates="feedback")
 
 class ErrorReport(Base):
     __tablename__ = "error_reports"
+    # Admin listing (date range filter)
+    __table_args__ = (
+        Index("ix_error_reports_created", "created_at", "report_id"),
+    )
     
     # FR-20: Reporting technical issues
     report_id = Column(Integer, primary_key=True, index=True)
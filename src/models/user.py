@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Float, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from src.database import Base
 
 class User(Base):
     __tablename__ = "users"
+    # Admin listing (role filter, newest first)
+    __table_args__ = (
+        Index("ix_users_role", "role", "user_id"),
+    )
 
     user_id = Column(Integer, primary_key=True, index=True)
     username = Column(String(50), unique=True, nullable=False)
@@ -31,6 +35,7 @@ class Student(User):
 
     # İlişkiler
     level_record = relationship("LevelRecord", back_populates="student", uselist=False)
+    stats = relationship("StudentStats", back_populates="student", uselist=False, cascade="all, delete-orphan")
     exam_sessions = relationship("src.models.exam.ExamSession", back_populates="student")
     error_reports = relationship("src.models.report.ErrorReport", back_populates="student")
 
@@ -63,4 +68,22 @@ class LevelRecord(Base):
     # Genel seviye varsayılan A1  (görüntüleme için)
     overall_level = Column(String(5), default="A1")
     
-    student = relationship("Student", back_populates="level_record")
\ No newline at end of file
+    student = relationship("Student", back_populates="level_record")
+
+class StudentStats(Base):
+    __tablename__ = "student_stats"
+
+    # Dashboard/profile aggregates, maintained on finalize / override / reset-cycle
+    student_id = Column(Integer, ForeignKey("students.user_id"), primary_key=True)
+    completed_count = Column(Integer, default=0, nullable=False)
+    score_sum = Column(Float, default=0.0, nullable=False)
+    last_level = Column(String(5), nullable=True)
+    # Current cycle: {"READING": {"session_id": 12, "score": 80.0}, ...}
+    skill_scores = Column(JSON, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    student = relationship("Student", back_populates="stats")
+
+    @property
+    def average_score(self) -> float:
+        return round(self.score_sum / self.completed_count, 1) if self.completed_count else 0.0
@@ -0,0 +1,94 @@
+import os
+import time
+import threading
+
+# Other workers' question edits are picked up after this many seconds at the latest
+ANSWER_KEY_TTL_SECONDS = int(os.getenv("ANSWER_KEY_TTL_SECONDS", "300"))
+
+
+def normalize_answer(text: str) -> str:
+    """Form used for exact-match grading: trimmed and lower-cased, as before the cache."""
+    return (text or "").strip().lower()
+
+
+class AnswerKey:
+    __slots__ = ("question_id", "correct_option_id", "variants", "display", "options")
+
+    def __init__(self, question_id: int, correct_option_id: int = None, variants: frozenset = frozenset(),
+                 display: str = None, options: dict = None):
+        self.question_id = question_id
+        self.correct_option_id = correct_option_id
+        # Normalized content of the correct option(s), matched as a whole string
+        self.variants = variants
+        self.display = display
+        # option_id -> content, so the report can be rendered without loading the options
+        self.options = options or {}
+
+
+class AnswerKeyCache:
+    """
+    Process-level map question_id -> AnswerKey, built from the question's
+    options on a miss, dropped when the question changes in this process and
+    rebuilt after ttl_seconds so edits made by other workers are picked up.
+    """
+
+    def __init__(self, ttl_seconds: int = ANSWER_KEY_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._keys = {}  # question_id -> (loaded_at, AnswerKey)
+        self.loads = 0
+        self.hits = 0
+
+    @staticmethod
+    def build(question_id: int, options) -> AnswerKey:
+        correct = [o for o in options if o.is_correct]
+        variants = frozenset(normalize_answer(o.content) for o in correct if normalize_answer(o.content))
+        return AnswerKey(
+            question_id=question_id,
+            correct_option_id=correct[0].option_id if correct else None,
+            variants=variants,
+            display=correct[0].content if correct else None,
+            options={o.option_id: o.content for o in options}
+        )
+
+    def get_many(self, question_ids, loader) -> dict:
+        """
+        Keys for the given questions. loader(missing_ids) returns the option rows
+        of the questions that are missing or stale, in a single query.
+        """
+        keys = {}
+        missing = []
+        now = time.monotonic()
+        for qid in set(question_ids):
+            entry = self._keys.get(qid)
+            if entry and now - entry[0] < self.ttl_seconds:
+                keys[qid] = entry[1]
+            else:
+                missing.append(qid)
+        self.hits += len(keys)
+
+        if missing:
+            options = {qid: [] for qid in missing}
+            for opt in loader(missing):
+                options[opt.question_id].append(opt)
+            built = {qid: self.build(qid, opts) for qid, opts in options.items()}
+            loaded_at = time.monotonic()
+            with self._lock:
+                self._keys.update((qid, (loaded_at, key)) for qid, key in built.items())
+                self.loads += len(built)
+            keys.update(built)
+        return keys
+
+    def invalidate(self, question_id: int = None):
+        with self._lock:
+            if question_id is None:
+                self._keys.clear()
+            else:
+                self._keys.pop(question_id, None)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+# Single cache per worker process
+answer_key_cache = AnswerKeyCache()
@@ -1,5 +1,9 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import func
+from datetime import datetime
 from src.models.report import ErrorReport
+from src.models.user import User
+from src.utils.pagination import keyset_page, count_cache
 
 class ErrorReportRepository:
     def __init__(self, db: Session):
@@ -10,4 +14,25 @@ class ErrorReportRepository:
         self.db.add(report) 
         self.db.commit()
         self.db.refresh(report)
-        return report
\ No newline at end of file
+        count_cache.invalidate("reports")
+        return report
+
+    def list_page(self, limit: int, cursor: str = None, descending: bool = True,
+                  issue_type: str = None, date_from: datetime = None, date_to: datetime = None):
+        """Admin listing: projected report rows with the student name. Returns (rows, next_cursor, total)."""
+        filters = []
+        if issue_type: filters.append(ErrorReport.issue_type == issue_type)
+        if date_from: filters.append(ErrorReport.created_at >= date_from)
+        if date_to: filters.append(ErrorReport.created_at < date_to)
+
+        query = self.db.query(
+            ErrorReport.report_id, ErrorReport.issue_type, ErrorReport.description, ErrorReport.created_at, User.username
+        ).outerjoin(User, ErrorReport.student_id == User.user_id).filter(*filters)
+        # report_id follows creation order, so it doubles as the "newest first" key
+        rows, next_cursor = keyset_page(query, ErrorReport.report_id, ErrorReport.report_id, limit, cursor, descending)
+
+        total = count_cache.get(
+            ("reports", issue_type, date_from, date_to),
+            lambda: self.db.query(func.count(ErrorReport.report_id)).filter(*filters).scalar()
+        )
+        return rows, next_cursor, total
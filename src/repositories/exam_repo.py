@@ -1,9 +1,29 @@
 from sqlalchemy.orm import Session, joinedload
+from dataclasses import dataclass, field
 from sqlalchemy.sql.expression import func
+from sqlalchemy.dialects import mysql, sqlite, postgresql
 from datetime import datetime, timedelta
-from src.models.exam import ExamSession, Answer, Question
-from src.models.user import LevelRecord
+from src.models.exam import ExamSession, Answer, Question, QuestionOption
+from src.models.user import User, LevelRecord
 from src.models.report import FeedbackReport
+from src.repositories.question_pool import question_pool_cache, question_to_payload, get_question_version
+from src.repositories.answer_keys import answer_key_cache
+from src.repositories.stats_repo import StudentStatsRepository
+from src.utils.pagination import keyset_page, count_cache
+
+@dataclass
+class GradingPlan:
+    """Everything finalize/override needs, loaded up front (no lazy loads while grading)."""
+    session: ExamSession
+    answers: list = field(default_factory=list)
+    # question_id -> AnswerKey (correct option id + normalized accepted answers)
+    answer_keys: dict = field(default_factory=dict)
+
+    @property
+    def skill(self):
+        first_q = self.answers[0].question if self.answers else None
+        return first_q.skill_category if first_q else None
+
 
 class ExamRepository:
     def __init__(self, db: Session):
@@ -18,6 +38,7 @@ class ExamRepository:
         record.listening_level = None
         record.speaking_level = None
         record.overall_level = "A1"
+        StudentStatsRepository(self.db).reset_cycle(record.student_id)
         self.db.commit()
     
     def get_active_session(self, user_id: int):
@@ -45,12 +66,49 @@ class ExamRepository:
     def get_session(self, sid: int):
         return self.db.query(ExamSession).get(sid)
 
+    def lock_session(self, session_id: int):
+        """
+        Row lock on the session until the current transaction ends. Submit takes
+        it before writing the answers and moving the session to GRADING, so an
+        autosave (direct or buffered) either finishes first or sees the session
+        is no longer IN_PROGRESS. Returns the status.
+        """
+        return self.db.query(ExamSession.status)\
+            .filter(ExamSession.session_id == session_id)\
+            .with_for_update()\
+            .scalar()
+
+    def get_grading_plan(self, session_id: int):
+        """
+        Loads the session with its answers and questions in a single query and
+        attaches the cached answer key of every question; options are only
+        queried for questions whose key is not cached yet.
+        """
+        session = self.db.query(ExamSession)\
+            .options(joinedload(ExamSession.answers).joinedload(Answer.question))\
+            .filter(ExamSession.session_id == session_id)\
+            .first()
+        if not session:
+            return None
+
+        answers = sorted(session.answers, key=lambda a: a.answer_id)
+        answer_keys = answer_key_cache.get_many(
+            (a.question_id for a in answers),
+            lambda missing: self.db.query(QuestionOption).filter(QuestionOption.question_id.in_(missing)).all()
+        )
+        return GradingPlan(session=session, answers=answers, answer_keys=answer_keys)
+
     def mark_session_abandoned(self, session: ExamSession):
         session.status = "ABANDONED"
         session.overall_score = 0.0
         session.end_time = datetime.now()
         self.db.commit()
 
+    def mark_session_grading(self, session_id: int):
+        """Submitted: answers are final, grading runs outside the row lock. Caller commits."""
+        self.db.query(ExamSession).filter(ExamSession.session_id == session_id)\
+            .update({ExamSession.status: "GRADING"}, synchronize_session="fetch")
+
     def mark_session_expired(self, session: ExamSession):
         session.status = "EXPIRED"
         session.end_time = datetime.now()
@@ -59,17 +117,73 @@ class ExamRepository:
     def find_records_by_student_id(self, student_id: int):
         return self.db.query(ExamSession).filter(ExamSession.student_id == student_id).all()
 
+    def get_history_page(self, student_id: int, limit: int, cursor: str = None):
+        """
+        One page of a student's sessions, newest first, keyset-paginated on
+        (start_time, session_id). Only the listed columns are selected
+        (ai_feedback etc. are never loaded). Returns (rows, next_cursor).
+        """
+        query = self.db.query(
+            ExamSession.session_id,
+            ExamSession.start_time,
+            ExamSession.detected_level,
+            ExamSession.overall_score,
+            ExamSession.status
+        ).filter(ExamSession.student_id == student_id)
+
+        return keyset_page(query, ExamSession.start_time, ExamSession.session_id, limit, cursor)
+
+    def list_sessions_page(self, limit: int, cursor: str = None, sort: str = "end_time", descending: bool = True,
+                           status: str = "COMPLETED", level: str = None, student_id: int = None,
+                           date_from: datetime = None, date_to: datetime = None):
+        """Admin listing: projected session rows with the student name, filtered server-side."""
+        filters = []
+        if status: filters.append(ExamSession.status == status)
+        if level: filters.append(ExamSession.detected_level == level)
+        if student_id: filters.append(ExamSession.student_id == student_id)
+        if date_from: filters.append(ExamSession.end_time >= date_from)
+        if date_to: filters.append(ExamSession.end_time < date_to)
+
+        query = self.db.query(
+            ExamSession.session_id,
+            ExamSession.student_id,
+            ExamSession.overall_score,
+            ExamSession.detected_level,
+            ExamSession.start_time,
+            ExamSession.end_time,
+            ExamSession.status,
+            User.username
+        ).outerjoin(User, ExamSession.student_id == User.user_id).filter(*filters)
+
+        # Keyset needs a non-null sort key: unfinished sessions sort by their start, like the "date" shown
+        if sort == "overall_score":
+            sort_col = func.coalesce(ExamSession.overall_score, 0.0).label("sort_score")
+        else:
+            sort_col = func.coalesce(ExamSession.end_time, ExamSession.start_time).label("sort_time")
+        rows, next_cursor = keyset_page(query.add_columns(sort_col), sort_col, ExamSession.session_id, limit, cursor, descending)
+
+        total = count_cache.get(
+            ("sessions", status, level, student_id, date_from, date_to),
+            lambda: self.db.query(func.count(ExamSession.session_id)).filter(*filters).scalar()
+        )
+        return rows, next_cursor, total
+
     def get_questions_by_skill(self, skill: str, level: str, limit: int = 10):
-        return self.db.query(Question)\
+        """Random questions for an exam, sampled from the in-memory pool of the skill/level."""
+        return question_pool_cache.sample(
+            skill, level, limit, lambda: self._load_question_pool(skill, level), get_question_version(self.db)
+        )
+
+    def _load_question_pool(self, skill: str, level: str):
+        questions = self.db.query(Question)\
             .options(joinedload(Question.options))\
             .filter(
                 Question.skill_category.ilike(skill),
                 Question.difficulty == level,
                 Question.is_active == True
             )\
-            .order_by(func.random())\
-            .limit(limit)\
             .all()
+        return [question_to_payload(q) for q in questions]
 
     def save_answer(self, session_id: int, question_id: int, selected_option_id: int = None, text_response: str = None):
         existing_ans = self.db.query(Answer).filter(
@@ -96,6 +210,59 @@ class ExamRepository:
 
         self.db.commit()
 
+    def bulk_upsert_answers(self, session_id: int, answers: list, commit: bool = True):
+        """
+        Saves all answers of a session in one statement and one transaction.
+        answers: dicts with question_id, selected_option_id and content.
+        Uses the dialect's native upsert on the (session_id, question_id) unique key.
+        commit=False leaves the transaction (and a session row lock) open for the caller.
+        """
+        # Last answer wins if the same question appears twice
+        rows = list({
+            a["question_id"]: {
+                "session_id": session_id,
+                "question_id": a["question_id"],
+                "selected_option_id": a.get("selected_option_id"),
+                "content": a.get("content"),
+            }
+            for a in answers
+        }.values())
+
+        if rows:
+            dialect = self.db.get_bind().dialect.name
+            if dialect == "mysql":
+                stmt = mysql.insert(Answer).values(rows)
+                stmt = stmt.on_duplicate_key_update(
+                    selected_option_id=stmt.inserted.selected_option_id,
+                    content=stmt.inserted.content
+                )
+                self.db.execute(stmt)
+            elif dialect in ("sqlite", "postgresql"):
+                insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+                stmt = insert(Answer).values(rows)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[Answer.session_id, Answer.question_id],
+                    set_={
+                        "selected_option_id": stmt.excluded.selected_option_id,
+                        "content": stmt.excluded.content
+                    }
+                )
+                self.db.execute(stmt)
+            else:
+                # Other databases: one lookup per answer, still a single transaction
+                for row in rows:
+                    existing = self.get_answer_by_session_question(session_id, row["question_id"])
+                    if existing:
+                        existing.selected_option_id = row["selected_option_id"]
+                        existing.content = row["content"]
+                    else:
+                        self.db.add(Answer(**row))
+
+        self.db.query(ExamSession).filter(ExamSession.session_id == session_id)\
+            .update({ExamSession.last_activity: func.now()}, synchronize_session=False)
+        if commit:
+            self.db.commit()
+
     def get_answer_by_session_question(self, session_id: int, question_id: int):
         return self.db.query(Answer).filter(
             Answer.session_id == session_id,
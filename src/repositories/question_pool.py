@@ -0,0 +1,122 @@
+import os
+import time
+import random
+import threading
+from itertools import chain
+
+from sqlalchemy import event, select, update, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src.models.exam import Question, QuestionOption, CacheVersion
+
+# Backstop for edits made outside the ORM (raw SQL); ORM edits from any worker bump the shared version
+QUESTION_POOL_TTL_SECONDS = int(os.getenv("QUESTION_POOL_TTL_SECONDS", "300"))
+QUESTION_VERSION_NAME = "questions"
+
+
+def get_question_version(db) -> int:
+    """Shared version of the question bank (one primary-key read)."""
+    return db.execute(select(CacheVersion.version).where(CacheVersion.name == QUESTION_VERSION_NAME)).scalar() or 0
+
+
+def bump_question_version(conn):
+    """Increments the shared version inside the caller's transaction."""
+    bumped = conn.execute(
+        update(CacheVersion).where(CacheVersion.name == QUESTION_VERSION_NAME)
+        .values(version=CacheVersion.version + 1)
+    ).rowcount
+    if not bumped:
+        try:
+            with conn.begin_nested():
+                conn.execute(insert(CacheVersion).values(name=QUESTION_VERSION_NAME, version=1))
+        except IntegrityError:
+            # Another worker created the row first
+            bump_question_version(conn)
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_on_question_change(session, flush_context, instances):
+    """Any added, edited or deleted question/option (admin, seed scripts) bumps the version."""
+    if any(isinstance(obj, (Question, QuestionOption)) for obj in chain(session.new, session.dirty, session.deleted)):
+        bump_question_version(session.connection())
+
+
+class QuestionPoolCache:
+    """
+    Per-(skill, difficulty) cache of the active questions with their options,
+    so starting an exam samples in memory instead of running ORDER BY RAND().
+    Pools hold plain dicts (the exam payload), never session-bound ORM objects.
+    Each pool remembers the shared question version it was built at and is
+    rebuilt when another worker (or this one) has changed the questions since.
+    """
+
+    def __init__(self, ttl_seconds: int = QUESTION_POOL_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._pools = {}  # (skill, difficulty) -> (loaded_at, version, [question dict])
+        self.loads = 0
+        self.hits = 0
+
+    @staticmethod
+    def _key(skill: str, difficulty: str):
+        return ((skill or "").strip().lower(), difficulty)
+
+    def _fresh(self, entry, version: int) -> bool:
+        return entry is not None and entry[1] == version and time.monotonic() - entry[0] < self.ttl_seconds
+
+    def get_pool(self, skill: str, difficulty: str, loader, version: int = 0) -> list:
+        """
+        Returns the cached pool, calling loader() to (re)build it when missing,
+        built at another question version, or older than the TTL.
+        """
+        key = self._key(skill, difficulty)
+        entry = self._pools.get(key)
+        if self._fresh(entry, version):
+            self.hits += 1
+            return entry[2]
+
+        with self._lock:
+            entry = self._pools.get(key)
+            if self._fresh(entry, version):
+                self.hits += 1
+                return entry[2]
+
+            pool = loader()
+            self._pools[key] = (time.monotonic(), version, pool)
+            self.loads += 1
+            return pool
+
+    def sample(self, skill: str, difficulty: str, limit: int, loader, version: int = 0) -> list:
+        pool = self.get_pool(skill, difficulty, loader, version)
+        return random.sample(pool, min(limit, len(pool)))
+
+    def invalidate(self):
+        """Called whenever the question pool changes."""
+        with self._lock:
+            self._pools.clear()
+
+    def stats(self) -> dict:
+        return {
+            "pools": len(self._pools),
+            "questions": sum(len(p) for _, _, p in self._pools.values()),
+            "loads": self.loads,
+            "hits": self.hits,
+        }
+
+
+def question_to_payload(q) -> dict:
+    """Exam payload of a question (correct answers are never included)."""
+    return {
+        "question_id": q.question_id,
+        "text": q.text,
+        "type": q.type,
+        "difficulty": q.difficulty,
+        "skill_category": q.skill_category,
+        "media_url": q.media_url,
+        "options": [{"option_id": o.option_id, "content": o.content} for o in q.options],
+    }
+
+
+# Single cache per worker process
+question_pool_cache = QuestionPoolCache()
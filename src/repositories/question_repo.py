@@ -1,5 +1,9 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from src.models.exam import Question
+from src.utils.pagination import keyset_page, count_cache
+from src.repositories.question_pool import question_pool_cache
+from src.repositories.answer_keys import answer_key_cache
 
 class QuestionRepository:
     def __init__(self, db: Session):
@@ -9,6 +13,9 @@ class QuestionRepository:
         self.db.add(q)
         self.db.commit()
         self.db.refresh(q)
+        question_pool_cache.invalidate()
+        answer_key_cache.invalidate(q.question_id)
+        count_cache.invalidate("questions")
         return q
     
     def get_by_id(self, qid: int):
@@ -17,17 +24,40 @@ class QuestionRepository:
     def find_questions(self, difficulty: str, skill_category: str):
         return self.db.query(Question).filter(
             Question.difficulty == difficulty,
-            Question.skill_category == skill_category,
+            Question.skill_category.ilike(skill_category),
             Question.is_active == True
         ).all()
         
     def get_all(self):
         return self.db.query(Question).all()
+
+    def list_page(self, limit: int, cursor: str = None, descending: bool = True,
+                  skill: str = None, level: str = None, type: str = None):
+        """Admin listing: projected question rows, filtered server-side. Returns (rows, next_cursor, total)."""
+        filters = []
+        # Same case-insensitive match as the exam pool (exam_repo) and the export
+        if skill: filters.append(Question.skill_category.ilike(skill))
+        if level: filters.append(Question.difficulty == level)
+        if type: filters.append(Question.type == type)
+
+        query = self.db.query(
+            Question.question_id, Question.text, Question.type, Question.difficulty, Question.skill_category
+        ).filter(*filters)
+        rows, next_cursor = keyset_page(query, Question.question_id, Question.question_id, limit, cursor, descending)
+
+        total = count_cache.get(
+            ("questions", skill.upper() if skill else None, level, type),
+            lambda: self.db.query(func.count(Question.question_id)).filter(*filters).scalar()
+        )
+        return rows, next_cursor, total
     
     def delete_question(self, qid: int):
         q = self.db.query(Question).get(qid)
         if q:
             self.db.delete(q)
             self.db.commit()
+            question_pool_cache.invalidate()
+            answer_key_cache.invalidate(qid)
+            count_cache.invalidate("questions")
             return True
         return False
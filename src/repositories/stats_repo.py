@@ -0,0 +1,171 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from src.models.exam import ExamSession, Answer, Question
+from src.models.user import Student, StudentStats, LevelRecord
+
+SKILL_LEVEL_FIELDS = {
+    "READING": "reading_level",
+    "WRITING": "writing_level",
+    "LISTENING": "listening_level",
+    "SPEAKING": "speaking_level",
+}
+
+
+class StudentStatsRepository:
+    """
+    Per-student aggregate row (completed exam count, score sum, last level,
+    latest score per skill). Updated incrementally by the write paths so the
+    dashboard and profile read a single row instead of scanning exam history.
+    Callers commit.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, student_id: int):
+        return self.db.get(StudentStats, student_id)
+
+    def get_or_rebuild(self, student_id: int):
+        """
+        Read path: a student without a stats row yet (e.g. before the first rebuild)
+        is built once. Commits the new row itself, since read routes never commit.
+        """
+        stats = self.get(student_id)
+        if stats is None and self.rebuild(student_id):
+            try:
+                self.db.commit()
+            except IntegrityError:
+                # A parallel request inserted the row first: theirs is just as fresh
+                self.db.rollback()
+            stats = self.get(student_id)
+        return stats
+
+    def get_or_create(self, student_id: int) -> StudentStats:
+        stats = self.get(student_id)
+        if stats is None:
+            stats = StudentStats(student_id=student_id, completed_count=0, score_sum=0.0, skill_scores={})
+            self.db.add(stats)
+        return stats
+
+    @staticmethod
+    def _set_skill_score(stats: StudentStats, skill: str, session_id: int, score: float):
+        # JSON column: assign a new dict so the change is detected
+        skill_scores = dict(stats.skill_scores or {})
+        skill_scores[skill.upper()] = {"session_id": session_id, "score": score}
+        stats.skill_scores = skill_scores
+
+    def record_result(self, session: ExamSession, skill: str, previous_score: float = None):
+        """
+        Adds a finalized session. previous_score is the session's old score when it
+        was already COMPLETED (re-finalize), so it is replaced instead of counted twice.
+        """
+        stats = self.get_or_create(session.student_id)
+        if previous_score is None:
+            stats.completed_count += 1
+            stats.score_sum += session.overall_score or 0.0
+        else:
+            stats.score_sum += (session.overall_score or 0.0) - previous_score
+        stats.last_level = session.detected_level
+        if skill:
+            self._set_skill_score(stats, skill, session.session_id, session.overall_score)
+        return stats
+
+    def apply_override(self, session: ExamSession, skill: str, old_score: float):
+        """Admin score change: the session's contribution to the sum is replaced."""
+        if session.status != "COMPLETED":
+            return None
+        stats = self.get_or_create(session.student_id)
+        stats.score_sum += (session.overall_score or 0.0) - (old_score or 0.0)
+
+        skill_entry = (stats.skill_scores or {}).get((skill or "").upper())
+        if skill_entry and skill_entry.get("session_id") == session.session_id:
+            self._set_skill_score(stats, skill, session.session_id, session.overall_score)
+        return stats
+
+    def reset_cycle(self, student_id: int):
+        """New exam cycle: per-skill scores are cleared, history totals are kept."""
+        stats = self.get(student_id)
+        if stats:
+            stats.skill_scores = {}
+        return stats
+
+    def rebuild(self, student_id: int = None) -> int:
+        """
+        Recomputes the aggregates from exam_sessions (all students, or one).
+        Per-skill scores take the latest completed session of each skill that is
+        still graded in the student's LevelRecord (i.e. part of the current cycle).
+        """
+        sessions = self.db.query(ExamSession).filter(ExamSession.status == "COMPLETED")
+        student_ids = self.db.query(Student.user_id)
+        if student_id is not None:
+            sessions = sessions.filter(ExamSession.student_id == student_id)
+            student_ids = student_ids.filter(Student.user_id == student_id)
+
+        totals = {
+            sid: (count, total or 0.0)
+            for sid, count, total in sessions.with_entities(
+                ExamSession.student_id, func.count(ExamSession.session_id), func.sum(ExamSession.overall_score)
+            ).group_by(ExamSession.student_id)
+        }
+
+        records = self.db.query(LevelRecord)
+        if student_id is not None:
+            records = records.filter(LevelRecord.student_id == student_id)
+        cycle_skills = {
+            r.student_id: {skill for skill, field in SKILL_LEVEL_FIELDS.items() if getattr(r, field)}
+            for r in records
+        }
+
+        # One row per (session, skill), newest session first
+        latest = {}
+        last_level = {}
+        rows = sessions.outerjoin(Answer, Answer.session_id == ExamSession.session_id).outerjoin(
+            Question, Question.question_id == Answer.question_id
+        ).with_entities(
+            ExamSession.student_id, ExamSession.session_id, ExamSession.end_time,
+            ExamSession.overall_score, ExamSession.detected_level, Question.skill_category
+        ).distinct().order_by(ExamSession.end_time.desc(), ExamSession.session_id.desc())
+
+        for sid, session_id, _, score, level, skill in rows:
+            last_level.setdefault(sid, level)
+            skills = latest.setdefault(sid, {})
+            skill = (skill or "").upper()
+            if skill in cycle_skills.get(sid, ()) and skill not in skills:
+                skills[skill] = {"session_id": session_id, "score": score}
+
+        existing = self.db.query(StudentStats)
+        if student_id is not None:
+            existing = existing.filter(StudentStats.student_id == student_id)
+        existing = {stats.student_id: stats for stats in existing}
+
+        rebuilt = 0
+        for (sid,) in student_ids:
+            count, total = totals.get(sid, (0, 0.0))
+            stats = existing.get(sid)
+            if stats is None:
+                stats = StudentStats(student_id=sid)
+                self.db.add(stats)
+            stats.completed_count = count
+            stats.score_sum = total
+            stats.last_level = last_level.get(sid)
+            stats.skill_scores = latest.get(sid, {})
+            rebuilt += 1
+
+        return rebuilt
+
+
+if __name__ == "__main__":
+    # Rebuild command: python -m src.repositories.stats_repo [student_id]
+    import sys
+    from src.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        target = int(sys.argv[1]) if len(sys.argv) > 1 else None
+        count = StudentStatsRepository(db).rebuild(target)
+        db.commit()
+        print(f"✅ Student stats rebuilt for {count} student(s).")
+    finally:
+        db.close()
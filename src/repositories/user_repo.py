@@ -1,6 +1,9 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import func
+from datetime import datetime
 from src.models.user import User, Student, LevelRecord
 from src.schemas.auth import UserCreate
+from src.utils.pagination import keyset_page, count_cache
 
 class UserRepository:
     def __init__(self, db: Session):
@@ -15,11 +18,35 @@ class UserRepository:
     def get_all_users(self):
         return self.db.query(User).order_by(User.user_id.desc()).all()
 
+    def list_users_page(self, limit: int, cursor: str = None, sort: str = "user_id", descending: bool = True,
+                        role: str = None, is_active: bool = None, joined_from: datetime = None, joined_to: datetime = None):
+        """Admin listing: projected user rows, filtered server-side. Returns (rows, next_cursor, total)."""
+        filters = []
+        if role: filters.append(User.role == role)
+        if is_active is not None: filters.append(User.is_active == is_active)
+        if joined_from: filters.append(User.created_at >= joined_from)
+        if joined_to: filters.append(User.created_at < joined_to)
+
+        query = self.db.query(
+            User.user_id, User.username, User.email, User.role, User.is_active, User.created_at
+        ).filter(*filters)
+
+        # user_id follows registration order (newest first by default)
+        sort_col = {"user_id": User.user_id, "username": User.username}.get(sort, User.user_id)
+        rows, next_cursor = keyset_page(query, sort_col, User.user_id, limit, cursor, descending)
+
+        total = count_cache.get(
+            ("users", role, is_active, joined_from, joined_to),
+            lambda: self.db.query(func.count(User.user_id)).filter(*filters).scalar()
+        )
+        return rows, next_cursor, total
+
     def delete_user(self, user_id: int):
         user = self.db.query(User).get(user_id)
         if user:
             self.db.delete(user)
             self.db.commit()
+            count_cache.invalidate("users")
             return True
         return False
 
@@ -48,6 +75,7 @@ class UserRepository:
             
             self.db.commit()
             self.db.refresh(db_student)
+            count_cache.invalidate("users")
             return db_student
             
         except Exception as e:
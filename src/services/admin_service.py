@@ -6,6 +6,13 @@ from src.repositories.exam_repo import ExamRepository
 from src.repositories.question_repo import QuestionRepository
 from src.schemas.exam import QuestionCreate
 from src.repositories.user_repo import UserRepository
+from src.repositories.stats_repo import StudentStatsRepository
+from src.repositories.error_repo import ErrorReportRepository
+from src.services.report_service import ReportService, level_for_score, level_feedback_line
+from src.utils.pagination import count_cache
+
+# Marks the override note in a session's feedback (replaced, not repeated, on the next override)
+ADMIN_NOTE_PREFIX = "🛠️"
 
 class AdminService:
     def __init__(self, db: Session):
@@ -13,6 +20,7 @@ class AdminService:
         self.q_repo = QuestionRepository(db)
         self.ex_repo = ExamRepository(db)
         self.u_repo = UserRepository(db)
+        self.r_repo = ErrorReportRepository(db)
 
     # =========================================================================
     # 1. QUESTION MANAGEMENT
@@ -38,8 +46,8 @@ class AdminService:
         result = self.q_repo.add_question(q)
         return result
 
-    def get_all_questions(self):
-        return self.q_repo.get_all()
+    def list_questions(self, limit: int, cursor: str = None, **filters):
+        return self.q_repo.list_page(limit, cursor, **filters)
 
     def remove_question(self, question_id: int):
         return self.q_repo.delete_question(question_id)
@@ -48,8 +56,8 @@ class AdminService:
     # 2. USER MANAGEMENT (FR-18 EXISTING)
     # =========================================================================
 
-    def get_all_users(self):
-        return self.u_repo.get_all_users()
+    def list_users(self, limit: int, cursor: str = None, **filters):
+        return self.u_repo.list_users_page(limit, cursor, **filters)
 
     def remove_user(self, user_id: int):
         """Permanently deletes the user (Use with caution)."""
@@ -78,37 +86,37 @@ class AdminService:
     # 3. EXAM AND SCORE MANAGEMENT (FR-17 EXISTING)
     # =========================================================================
 
-    def get_all_exam_sessions(self):
-        return self.db.query(ExamSession, User.username).outerjoin(
-            User, ExamSession.student_id == User.user_id
-        ).filter(
-            ExamSession.status == "COMPLETED"
-        ).order_by(ExamSession.end_time.desc()).all()
+    def list_exam_sessions(self, limit: int, cursor: str = None, **filters):
+        return self.ex_repo.list_sessions_page(limit, cursor, **filters)
 
     def override_score(self, session_id: int, new_score: float):
         """
         FR-17: Admin modifies the score. Report card and Exam are updated.
         """
-        sess = self.db.query(ExamSession).filter(ExamSession.session_id == session_id).first()
+        plan = self.ex_repo.get_grading_plan(session_id)
+        sess = plan.session if plan else None
         
         if sess:
             print(f"🔄 Admin Updating Score: ID {session_id} -> {new_score}")
 
             # 1. Update Exam Session
+            old_score = sess.overall_score
             sess.overall_score = new_score
-            new_level = "A1"
-            if new_score >= 85: new_level = "C1"
-            elif new_score >= 70: new_level = "B2"
-            elif new_score >= 50: new_level = "B1"
-            elif new_score >= 30: new_level = "A2"
-            
+            new_level = level_for_score(new_score)
             sess.detected_level = new_level
 
+            # Level line of the feedback follows the new score; the AI assessment below it is kept
+            paragraphs = (sess.ai_feedback or "").split("\n\n")[1:]
+            paragraphs = [p for p in paragraphs if not p.startswith(ADMIN_NOTE_PREFIX)]
+            sess.ai_feedback = "\n\n".join(
+                [level_feedback_line(new_score)] + paragraphs
+                + [f"{ADMIN_NOTE_PREFIX} Score changed by an administrator ({old_score} -> {new_score})."]
+            )
+
             # 2. Update Report Card (LevelRecord)
             record = self.db.query(LevelRecord).filter(LevelRecord.student_id == sess.student_id).first()
-            if record and sess.answers:
-                first_q = sess.answers[0].question
-                skill_type = first_q.skill_category.upper() if first_q else "GENERAL"
+            if record and plan.answers:
+                skill_type = plan.skill.upper() if plan.skill else "GENERAL"
 
                 if "READING" in skill_type: record.reading_level = new_level
                 elif "WRITING" in skill_type: record.writing_level = new_level
@@ -117,7 +125,19 @@ class AdminService:
                 
                 self._recalculate_overall_level(record)
 
-            # 4. Save
+            # 3. Update Student Stats (dashboard average)
+            StudentStatsRepository(self.db).apply_override(sess, plan.skill, old_score)
+
+            # 4. Refresh the stored report (score, level, feedback, breakdown)
+            reports = ReportService(self.db)
+            report = reports.get_report(session_id)
+            breakdown = self._rescale_breakdown(
+                report.score_breakdown if report and report.score_breakdown else {plan.skill or "General": old_score or 0.0},
+                old_score, new_score
+            )
+            reports.save_report(sess, plan.answers, breakdown, sess.ai_feedback, plan.answer_keys)
+
+            # 5. Save
             try:
                 self.db.commit()
                 self.db.refresh(sess)
@@ -128,6 +148,14 @@ class AdminService:
         
         return False
 
+    @staticmethod
+    def _rescale_breakdown(breakdown: dict, old_score: float, new_score: float) -> dict:
+        """Per-skill scores scaled by new/old (capped at 100), so their average follows the overridden score."""
+        if not old_score:
+            return {skill: new_score for skill in breakdown}
+        factor = new_score / old_score
+        return {skill: round(min(100.0, (score or 0.0) * factor), 1) for skill, score in breakdown.items()}
+
     def _recalculate_overall_level(self, record):
         level_map = { "A1": 20, "A2": 40, "B1": 60, "B2": 80, "C1": 100, "C2": 100 }
         
@@ -150,12 +178,8 @@ class AdminService:
     # 4. TECHNICAL SUPPORT AND REPORTS (FR-20 ADDED)
     # =========================================================================
 
-    def get_all_reports(self):
-        """Lists all technical issue reports."""
-        # Joining with User table to get the student name
-        return self.db.query(ErrorReport, User.username).join(
-            User, ErrorReport.student_id == User.user_id
-        ).order_by(ErrorReport.created_at.desc()).all()
+    def list_reports(self, limit: int, cursor: str = None, **filters):
+        return self.r_repo.list_page(limit, cursor, **filters)
 
     def resolve_report(self, report_id: int):
         """Marks the issue as resolved (Deletes from database)."""
@@ -164,6 +188,7 @@ class AdminService:
             try:
                 self.db.delete(report)
                 self.db.commit()
+                count_cache.invalidate("reports")
                 return True
             except Exception as e:
                 print(f"❌ Report Deletion Error: {e}")
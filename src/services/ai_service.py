@@ -1,84 +1,313 @@
 import os
 import random
 import json
+import time
+import hashlib
+import sys
+import importlib
+import threading
 from datetime import datetime
-import textstat  # Required for legacy analysis (pip install textstat)
+from functools import lru_cache
 
-# --- NEW LIBRARY SETUP ---
-try:
-    from google import genai
-    from google.genai import types
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
-    print("⚠️ WARNING: 'google-genai' library is not installed.")
+# NOTE: google-genai, whisper (torch), spacy and textstat are heavy. They are
+# imported by the ModelRegistry on first use, never at module import time.
 
 # --- API KEY SETUP ---
 # Replace this with your actual API key
 API_KEY = "YOUR_API_KEY_HERE" 
 
-# --- IMPORT SAFETY ---
-try:
-    import whisper
-except ImportError:
-    whisper = None
+from src.services.evaluation_cache import EvaluationCache, make_evaluation_key
+from src.services.transcript_cache import transcript_cache, audio_digest
+from src.utils.resilience import CircuitBreaker, Deadline
+from src.utils.text_matcher import TermMatcher, get_keyword_matcher, tokenize
 
-try:
-    import spacy
-    try:
-        nlp = spacy.load("en_core_web_sm")
-    except OSError:
-        nlp = None
-except ImportError:
-    spacy = None
-    nlp = None
+# --- WORKER MODE ---
+# lazy    : libraries/models are loaded on the first request that needs them (default)
+# preload : everything is loaded at startup (dedicated inference workers)
+# off     : this worker serves no AI routes and never loads the AI stack
+AI_WORKER_MODE = os.getenv("AI_WORKER_MODE", "lazy").lower()
 
 # --- FFmpeg SETUP ---
 ffmpeg_path = r"C:\ffmpeg\bin"
 if os.path.exists(ffmpeg_path) and ffmpeg_path not in os.environ["PATH"]:
     os.environ["PATH"] += os.pathsep + ffmpeg_path
 
-class AIModule:
+WHISPER_MODEL_NAME = os.getenv("WHISPER_MODEL", "base")
+GEMINI_MODEL_NAME = "gemini-flash-latest"
+# Number of essays packed into one Gemini request in batch mode
+GEMINI_BATCH_SIZE = int(os.getenv("GEMINI_BATCH_SIZE", "5"))
+# Upper bound for a single Gemini call; a shorter exam deadline wins
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "20"))
+# Don't start a Gemini call with less budget than this left
+GEMINI_MIN_BUDGET_SECONDS = float(os.getenv("GEMINI_MIN_BUDGET_SECONDS", "2"))
+# Circuit breaker: consecutive failures before opening, and how long to stay open
+GEMINI_BREAKER_THRESHOLD = int(os.getenv("GEMINI_BREAKER_THRESHOLD", "3"))
+GEMINI_BREAKER_COOLDOWN_SECONDS = float(os.getenv("GEMINI_BREAKER_COOLDOWN_SECONDS", "60"))
+
+# Shared by the single and the batch prompt
+WRITING_SCORING_RULES = """SCORING RULES:
+                1. If the text consists only of simple sentences (Subject+Verb+Object) like "My mother is a teacher.", the MAXIMUM score is 65.
+                2. To get above 70, the student MUST use conjunctions (because, but, so, however).
+                3. To get above 85, the student MUST use complex grammar (relative clauses, conditionals, advanced vocabulary).
+                4. Deduct points if the essay is too short compared to the task."""
+# Bump when the prompt wording changes: cached evaluations of the old prompt are dropped
+WRITING_PROMPT_REVISION = "1"
+# Bump when the rule-based measures change (2: diversity/complexity from the spaCy parse)
+WRITING_FEATURES_REVISION = "2"
+WRITING_PROMPT_VERSION = hashlib.sha256(
+    f"{GEMINI_MODEL_NAME}|{WRITING_PROMPT_REVISION}|{WRITING_FEATURES_REVISION}|{WRITING_SCORING_RULES}".encode("utf-8")
+).hexdigest()[:16]
+# Returned by speech_to_text when no transcript could be produced (the queue treats it as a failure)
+STT_ERROR_MSG = "[The audio was unintelligible or there was a technical error. Please check your microphone and try again.]"
+SPACY_MODEL_NAME = "en_core_web_sm"
+# nlp.pipe tuning for bulk rule-based analysis (n_process > 1 forks worker processes)
+SPACY_BATCH_SIZE = int(os.getenv("SPACY_BATCH_SIZE", "64"))
+SPACY_N_PROCESS = int(os.getenv("SPACY_N_PROCESS", "1"))
+
+
+def _current_rss_mb():
+    """Returns the resident memory of this process in MB (None if unknown)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is KB on Linux (peak, not current) - best effort fallback
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except (ImportError, OSError):
+        return None
+
+
+# Advanced vocabulary by CEFR level for the rule-based engine.
+# A larger list can be supplied as JSON ({"B1": [...], "B2": [...]}) via CEFR_VOCABULARY_PATH.
+CEFR_VOCABULARY_PATH = os.getenv("CEFR_VOCABULARY_PATH")
+DEFAULT_CEFR_VOCABULARY = {
+    "B1": ["because", "since", "unless", "usually", "generally", "although", "experience"],
+    "B2": ["however", "therefore", "despite", "whereas", "significant", "essential",
+           "opportunity", "challenging", "rewarding"],
+    "C1": ["furthermore", "consequently"],
+}
+
+
+@lru_cache(maxsize=1)
+def get_vocabulary_matcher() -> TermMatcher:
+    """Compiled matcher over the CEFR word list (built once per process)."""
+    vocabulary = DEFAULT_CEFR_VOCABULARY
+    if CEFR_VOCABULARY_PATH:
+        try:
+            with open(CEFR_VOCABULARY_PATH, encoding="utf-8") as f:
+                vocabulary = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ CEFR vocabulary could not be read ({e}), using the built-in list.")
+
+    return TermMatcher({word: level for level, words in vocabulary.items() for word in words})
+
+
+class ModelRegistry:
+    """
+    Process-wide holder for the heavy AI models (Whisper, spaCy, Gemini client).
+    Every model is loaded lazily on first use, exactly once per worker process.
+    """
+
     def __init__(self):
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] 🤖 AI Module Starting (HYBRID MODE)...")
-        
-        # 1. Initialize Gemini Client
-        self.client = None
-        if GEMINI_AVAILABLE and API_KEY and API_KEY != "YOUR_API_KEY_HERE":
+        self._lock = threading.Lock()
+        self._models = {}
+        self._stats = {}
+        self._import_lock = threading.Lock()
+        self._modules = {}
+        self.import_times = {}
+        self.startup_seconds = None
+        # Whisper keeps decoding state on the model, so transcriptions must not overlap
+        self.stt_lock = threading.Lock()
+
+    def _get_or_load(self, name: str, loader):
+        # Fast path: already loaded (or already failed -> None)
+        if name in self._models:
+            return self._models[name]
+
+        if AI_WORKER_MODE == "off":
+            # API-only worker: AI callers get their rule-based / error fallbacks
+            return None
+
+        with self._lock:
+            if name in self._models:
+                return self._models[name]
+
+            rss_before = _current_rss_mb()
+            started = time.perf_counter()
             try:
-                self.client = genai.Client(api_key=API_KEY)
-                print("✅ Gemini API Connected.")
+                model = loader()
+                error = None
             except Exception as e:
-                print(f"❌ Gemini Connection Error: {e}")
+                model = None
+                error = str(e)
+                print(f"❌ {name} Load Error: {e}")
+
+            rss_after = _current_rss_mb()
+            self._stats[name] = {
+                "loaded": model is not None,
+                "load_seconds": round(time.perf_counter() - started, 3),
+                "rss_delta_mb": round(rss_after - rss_before, 1) if rss_before is not None and rss_after is not None else None,
+                "loaded_at": datetime.now().isoformat(timespec="seconds"),
+                "error": error,
+            }
+            self._models[name] = model
+            return model
 
-        # 2. Load Whisper Model
-        self.stt_model = None
-        if whisper:
+    def import_module(self, module_name: str):
+        """Imports a heavy library on first use and records how long it took (None if missing)."""
+        if module_name in self._modules:
+            return self._modules[module_name]
+
+        with self._import_lock:
+            if module_name in self._modules:
+                return self._modules[module_name]
+
+            started = time.perf_counter()
             try:
-                self.stt_model = whisper.load_model("base")
-                print("✅ Whisper (Speech-to-Text) Ready.")
-            except Exception as e:
-                print(f"❌ Whisper Load Error: {e}")
-
-        # 3. Word List for Legacy Algorithm
-        self.advanced_vocabulary = [
-            "however", "therefore", "furthermore", "although", "despite",
-            "because", "since", "unless", "usually", "generally",
-            "significant", "essential", "opportunity", "experience",
-            "challenging", "rewarding", "consequently", "whereas"
-        ]
+                module = importlib.import_module(module_name)
+            except ImportError:
+                module = None
+                print(f"⚠️ WARNING: '{module_name}' library is not installed.")
+            self.import_times[module_name] = round(time.perf_counter() - started, 3)
+            self._modules[module_name] = module
+            return module
+
+    # --- Loaders ---
+    def get_gemini_client(self):
+        def _load():
+            if not (API_KEY and API_KEY != "YOUR_API_KEY_HERE"):
+                return None
+            genai = self.import_module("google.genai")
+            if not genai:
+                return None
+            client = genai.Client(api_key=API_KEY)
+            print("✅ Gemini API Connected.")
+            return client
+        return self._get_or_load("gemini", _load)
+
+    def get_whisper(self):
+        def _load():
+            whisper = self.import_module("whisper")
+            if not whisper:
+                return None
+            model = whisper.load_model(WHISPER_MODEL_NAME)
+            print("✅ Whisper (Speech-to-Text) Ready.")
+            return model
+        return self._get_or_load("whisper", _load)
+
+    def get_nlp(self):
+        def _load():
+            spacy = self.import_module("spacy")
+            if not spacy:
+                return None
+            try:
+                # NER is never used by the scoring, skip it
+                return spacy.load(SPACY_MODEL_NAME, exclude=["ner"])
+            except OSError:
+                return None
+        return self._get_or_load("spacy", _load)
+
+    def preload(self):
+        """Loads every model now (AI_WORKER_MODE=preload)."""
+        self.get_gemini_client()
+        self.get_nlp()
+        self.get_whisper()
+        self.import_module("textstat")
+
+    def stats(self) -> dict:
+        """Load times and memory footprint, used to verify one copy per worker."""
+        return {
+            "pid": os.getpid(),
+            "mode": AI_WORKER_MODE,
+            "startup_seconds": self.startup_seconds,
+            "rss_mb": _current_rss_mb(),
+            "import_seconds": dict(self.import_times),
+            "models": {name: dict(info) for name, info in self._stats.items()},
+        }
+
+
+# Single registry per worker process
+model_registry = ModelRegistry()
+
+# Cache of Gemini evaluations (memory LRU + local SQLite)
+evaluation_cache = EvaluationCache(WRITING_PROMPT_VERSION)
+
+# Sends traffic straight to the rule-based engine while Gemini keeps failing
+gemini_breaker = CircuitBreaker("gemini", GEMINI_BREAKER_THRESHOLD, GEMINI_BREAKER_COOLDOWN_SECONDS)
+gemini_deadline_skips = 0
+_deadline_skips_lock = threading.Lock()
+
+# HTTP statuses that mean quota exhaustion (429) or a Gemini-side outage
+GEMINI_OUTAGE_STATUSES = {429, 500, 502, 503, 504}
+
+
+def is_gemini_outage(error: Exception) -> bool:
+    """
+    True for quota / server / transport failures, the only ones that count
+    against the circuit breaker. Our own bugs (bad request, parsing) don't.
+    """
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    # Only modules that raised the error need checking, so nothing is imported here
+    genai_errors = sys.modules.get("google.genai.errors")
+    if genai_errors is not None and isinstance(error, genai_errors.APIError):
+        return getattr(error, "code", None) in GEMINI_OUTAGE_STATUSES
+    httpx = sys.modules.get("httpx")
+    if httpx is not None and isinstance(error, httpx.TransportError):
+        return True
+    api_core = sys.modules.get("google.api_core.exceptions")
+    if api_core is not None and isinstance(error, (api_core.ResourceExhausted, api_core.ServiceUnavailable, api_core.DeadlineExceeded)):
+        return True
+    return False
+
+
+class GeminiUnavailable(Exception):
+    """Gemini was not called (circuit open or latency budget exhausted)."""
+
+class AIModule:
+    def __init__(self, registry: ModelRegistry = None):
+        # Models are shared through the registry, so creating an AIModule is cheap
+        self.registry = registry or model_registry
+        self.cache = evaluation_cache
+
+        # 3. Word List for Legacy Algorithm (CEFR levelled, compiled once)
+        self.vocabulary_matcher = get_vocabulary_matcher()
+
+    # Lazily resolved through the shared registry
+    @property
+    def client(self):
+        return self.registry.get_gemini_client()
+
+    @property
+    def stt_model(self):
+        return self.registry.get_whisper()
+
+    @property
+    def nlp(self):
+        return self.registry.get_nlp()
 
     # ----------------------------------------------------------------
     # 1. HYBRID WRITING ANALYSIS (API FIRST -> THEN MATH)
     # ----------------------------------------------------------------
-    def evaluate_writing_hybrid(self, text: str, topic: str, level: str, keywords: list = None) -> dict:
+    def evaluate_writing_hybrid(self, text: str, topic: str, level: str, keywords: list = None, deadline: Deadline = None) -> dict:
         """
         Main Function: Tries Gemini first, falls back to legacy algorithm if it fails.
+        An optional deadline skips (or cuts short) the Gemini call when the budget runs out.
         """
         # Return immediately if text is too short
         if len(text) < 5:
              return self._create_fallback_response(text, "Text is too short to evaluate.", score=10)
 
+        # Same essay already graded with this prompt -> no API call
+        cache_key = make_evaluation_key(text, topic, level, keywords, WRITING_PROMPT_VERSION)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         # A) API CHECK
         if self.client:
             try:
@@ -89,11 +318,7 @@ class AIModule:
                 Topic: {topic}
                 Student's Essay: "{text}"
                 
-                SCORING RULES:
-                1. If the text consists only of simple sentences (Subject+Verb+Object) like "My mother is a teacher.", the MAXIMUM score is 65.
-                2. To get above 70, the student MUST use conjunctions (because, but, so, however).
-                3. To get above 85, the student MUST use complex grammar (relative clauses, conditionals, advanced vocabulary).
-                4. Deduct points if the essay is too short compared to the task.
+                {WRITING_SCORING_RULES}
                 
                 Provide output in VALID JSON:
                 {{
@@ -106,16 +331,20 @@ class AIModule:
                 Do not use markdown blocks.
                 """
                 
-                # API Call
-                response = self.client.models.generate_content(
-                    model="gemini-flash-latest", # Updated model name example
-                    contents=prompt
-                )
+                # API Call (circuit breaker + deadline)
+                response = self._generate(self.client, prompt, deadline)
                 
                 if response.text:
                     cleaned_text = response.text.replace("```json", "").replace("```", "").strip()
-                    return json.loads(cleaned_text)
+                    result = self._validate_feedback(json.loads(cleaned_text))
+                    if result is not None:
+                        # Only valid Gemini results are cached; rule-based fallbacks are cheap and temporary
+                        self.cache.set(cache_key, result)
+                        return result
+                    print("⚠️ Gemini result malformed, using 'Rule-Based' analysis.")
             
+            except GeminiUnavailable as e:
+                print(f"⏭️ Gemini skipped ({e}), using 'Rule-Based' analysis.")
             except Exception as e:
                 print(f"⚠️ Gemini API Error (Quota/Connection): {e}")
                 print("🔄 'Rule-Based' (Mathematical) Analysis Triggered...")
@@ -126,6 +355,185 @@ class AIModule:
 
         return self.analyze_writing_rule_based(text, keywords)
 
+    # ----------------------------------------------------------------
+    # 1b. BATCH WRITING ANALYSIS (SEVERAL ESSAYS -> ONE API CALL)
+    # ----------------------------------------------------------------
+    def evaluate_writing_batch(self, items: list, deadline: Deadline = None) -> list:
+        """
+        Grades several essays with one Gemini request per GEMINI_BATCH_SIZE items.
+        Each item is a dict with text, topic, level and keywords (same as evaluate_writing_hybrid).
+        Returns one WritingFeedback-shaped dict per item, in the same order.
+        """
+        results = [None] * len(items)
+        pending = []
+
+        keys = {}
+
+        for i, item in enumerate(items):
+            if len(item["text"]) < 5:
+                results[i] = self._create_fallback_response(item["text"], "Text is too short to evaluate.", score=10)
+                continue
+
+            keys[i] = make_evaluation_key(item["text"], item.get("topic"), item.get("level"), item.get("keywords"), WRITING_PROMPT_VERSION)
+            cached = self.cache.get(keys[i])
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append(i)
+
+        if not pending:
+            return results
+
+        client = self.client
+        if not client:
+            print("ℹ️ No API Key, performing direct mathematical analysis.")
+            self._fill_rule_based(items, pending, results)
+            return results
+
+        for start in range(0, len(pending), GEMINI_BATCH_SIZE):
+            chunk = pending[start:start + GEMINI_BATCH_SIZE]
+            if len(chunk) == 1:
+                i = chunk[0]
+                results[i] = self.evaluate_writing_hybrid(**items[i], deadline=deadline)
+                continue
+
+            try:
+                parsed = self._request_writing_batch(client, [items[i] for i in chunk], deadline)
+            except GeminiUnavailable as e:
+                print(f"⏭️ Gemini skipped ({e}), using 'Rule-Based' analysis for {len(chunk)} essays.")
+                self._fill_rule_based(items, chunk, results)
+                continue
+            except Exception as e:
+                # Quota / connection problem: the whole chunk goes to the rule-based engine
+                print(f"⚠️ Gemini Batch Error (Quota/Connection): {e}")
+                print("🔄 'Rule-Based' (Mathematical) Analysis Triggered...")
+                self._fill_rule_based(items, chunk, results)
+                continue
+
+            for pos, i in enumerate(chunk):
+                feedback = self._validate_feedback(parsed.get(pos))
+                if feedback is None:
+                    # Malformed or missing entry: retry this essay on its own
+                    print(f"⚠️ Batch result #{pos} malformed, retrying individually.")
+                    feedback = self.evaluate_writing_hybrid(**items[i], deadline=deadline)
+                else:
+                    self.cache.set(keys[i], feedback)
+                results[i] = feedback
+
+        return results
+
+    def _fill_rule_based(self, items: list, indexes: list, results: list):
+        analyses = self.analyze_writing_rule_based_batch(
+            [items[i]["text"] for i in indexes],
+            [items[i].get("keywords") for i in indexes]
+        )
+        for i, analysis in zip(indexes, analyses):
+            results[i] = analysis
+
+    def _request_writing_batch(self, client, items: list, deadline: Deadline = None) -> dict:
+        essays = "\n".join(
+            f'''
+                ESSAY id={pos}
+                Target level: {item.get("level", "A1")}
+                Topic: {item.get("topic", "General Task")}
+                Student's Essay: {json.dumps(item["text"])}'''
+            for pos, item in enumerate(items)
+        )
+
+        prompt = f"""
+                Act as a STRICT English Examiner (IELTS/TOEFL style). 
+                Evaluate each of the following {len(items)} essays independently.
+                {essays}
+                
+                {WRITING_SCORING_RULES}
+                
+                Provide output as a VALID JSON array with exactly one object per essay:
+                [
+                    {{
+                        "id": (the essay id),
+                        "score": (integer 0-100),
+                        "grammar_errors": ["list specific errors"],
+                        "suggestions": ["suggestion1", "suggestion2"],
+                        "corrected_text": "corrected version",
+                        "feedback_tr": "Give strict but constructive feedback in English. Mention why the score is low if sentences are too simple."
+                    }}
+                ]
+                Do not use markdown blocks.
+                """
+
+        response = self._generate(client, prompt, deadline)
+
+        by_id = {}
+        if not response.text:
+            return by_id
+        try:
+            cleaned_text = response.text.replace("```json", "").replace("```", "").strip()
+            data = json.loads(cleaned_text)
+        except ValueError:
+            # Unparseable response: every essay gets retried individually
+            return by_id
+
+        if isinstance(data, list):
+            for entry in data:
+                if isinstance(entry, dict) and isinstance(entry.get("id"), int):
+                    by_id[entry["id"]] = entry
+        return by_id
+
+    def _generate(self, client, prompt: str, deadline: Deadline = None):
+        """Every Gemini call goes through here: circuit breaker + per-call timeout."""
+        global gemini_deadline_skips
+
+        timeout = GEMINI_TIMEOUT_SECONDS
+        if deadline is not None:
+            timeout = min(timeout, deadline.remaining())
+        if timeout < GEMINI_MIN_BUDGET_SECONDS:
+            with _deadline_skips_lock:
+                gemini_deadline_skips += 1
+            raise GeminiUnavailable("latency budget exhausted")
+
+        if not gemini_breaker.allow_request():
+            raise GeminiUnavailable("circuit open")
+
+        try:
+            types = self.registry.import_module("google.genai.types")
+            config = types.GenerateContentConfig(
+                http_options=types.HttpOptions(timeout=int(timeout * 1000))
+            )
+            response = client.models.generate_content(model=GEMINI_MODEL_NAME, contents=prompt, config=config)
+        except Exception as e:
+            if is_gemini_outage(e):
+                gemini_breaker.record_failure(e)
+            else:
+                gemini_breaker.release_probe()
+            raise
+
+        gemini_breaker.record_success()
+        return response
+
+    def _validate_feedback(self, entry):
+        """Coerces a Gemini result into the WritingFeedback shape, None if it doesn't fit."""
+        if not isinstance(entry, dict):
+            return None
+        try:
+            score = int(entry["score"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        grammar_errors = entry.get("grammar_errors", [])
+        suggestions = entry.get("suggestions", [])
+        if not isinstance(grammar_errors, list) or not isinstance(suggestions, list):
+            return None
+        if not isinstance(entry.get("corrected_text", ""), str) or not isinstance(entry.get("feedback_tr"), str):
+            return None
+
+        return {
+            "score": max(0, min(100, score)),
+            "grammar_errors": [str(e) for e in grammar_errors],
+            "suggestions": [str(s) for s in suggestions],
+            "corrected_text": entry.get("corrected_text", ""),
+            "feedback_tr": entry["feedback_tr"]
+        }
+
     # ----------------------------------------------------------------
     # 2. LEGACY RELIABLE ALGORITHM (FAIL-SAFE)
     # ----------------------------------------------------------------
@@ -133,35 +541,96 @@ class AIModule:
         """
         Mathematical analysis that runs when the API is not working.
         """
-        doc = nlp(text) if nlp else None
+        return self.analyze_writing_rule_based_batch([text], [required_keywords])[0]
+
+    def analyze_writing_rule_based_batch(self, texts: list, keywords_list: list = None) -> list:
+        """
+        Rule-based analysis for many essays at once. With spaCy available the texts
+        are parsed through nlp.pipe and the parsed docs feed every feature.
+        """
+        keywords_list = keywords_list or [None] * len(texts)
+        nlp = self.nlp
+
+        if nlp:
+            docs = nlp.pipe(texts, batch_size=SPACY_BATCH_SIZE, n_process=SPACY_N_PROCESS)
+            features = [self._writing_features_from_doc(doc) for doc in docs]
+        else:
+            features = [self._writing_features_from_text(text) for text in texts]
+
+        return [
+            self._score_rule_based(text, feats, keywords)
+            for text, feats, keywords in zip(texts, features, keywords_list)
+        ]
+
+    def _writing_features_from_doc(self, doc) -> dict:
+        # Words are the alpha tokens, so punctuation does not count and "went"/"goes"
+        # are one lemma for diversity (and for keyword matches).
+        words = [t for t in doc if t.is_alpha]
+        lemmas = [t.lemma_.lower() for t in words]
+
+        # Complexity: average sentence length (20 words = 50 points) and the deepest
+        # dependency chain of each sentence (6 levels = 50 points, relative clauses etc.)
+        sentences = [sent for sent in doc.sents if any(t.is_alpha for t in sent)]
+        complexity = None
+        if sentences:
+            avg_length = len(words) / len(sentences)
+            avg_depth = sum(
+                max(sum(1 for _ in t.ancestors) for t in sent) for sent in sentences
+            ) / len(sentences)
+            complexity = min(50.0, avg_length / 20 * 50) + min(50.0, avg_depth / 6 * 50)
+
+        return {
+            "word_count": len(words),
+            "unique_count": len(set(lemmas)),
+            "complexity": complexity,
+            "tokens": tokenize(doc.text),
+            "lemmas": lemmas,
+        }
+
+    def _writing_features_from_text(self, text: str) -> dict:
+        # Fallback without spaCy: whitespace words and Flesch readability
         words = text.split()
-        word_count = len(words)
-        text_lower = text.lower()
+        textstat = self.registry.import_module("textstat")
+        try:
+            complexity = max(0, min(100, 100 - textstat.flesch_reading_ease(text)))
+        except:
+            complexity = None
+
+        lowered = [w.lower() for w in words]
+        return {
+            "word_count": len(words),
+            "unique_count": len(set(lowered)),
+            "complexity": complexity,
+            "tokens": tokenize(text),
+            "lemmas": [],
+        }
+
+    def _score_rule_based(self, text: str, features: dict, required_keywords: list = None) -> dict:
+        word_count = features["word_count"]
 
         # A. LENGTH SCORE (30%)
         score_length = min(100, (word_count / 50) * 100)
 
         # B. DIVERSITY SCORE (20%)
-        unique_words = set([w.lower() for w in words])
-        diversity_ratio = len(unique_words) / len(words) if words else 0
+        diversity_ratio = features["unique_count"] / word_count if word_count else 0
         score_diversity = min(100, (diversity_ratio / 0.6) * 100)
 
         # C. COMPLEXITY SCORE (20%)
-        try:
-            readability = textstat.flesch_reading_ease(text)
-            score_complexity = max(0, min(100, 100 - readability))
-        except:
-            score_complexity = 50.0
+        complexity = features["complexity"]
+        score_complexity = complexity if complexity is not None else 50.0
 
         # D. KEYWORD & ADVANCED VOCABULARY (30%)
+        tokens, lemmas = features["tokens"], features["lemmas"]
+
         relevance_score = 100.0
         if required_keywords:
-            match_count = sum(1 for k in required_keywords if k.lower() in text_lower)
+            keyword_matcher = get_keyword_matcher(tuple(required_keywords))
+            match_count = len(keyword_matcher.matched_terms(tokens) | keyword_matcher.matched_terms(lemmas))
             if match_count == 0: relevance_score = 40.0
             elif match_count == 1: relevance_score = 70.0
 
-        advanced_hits = [w for w in self.advanced_vocabulary if w in text_lower]
-        score_vocab = min(100, len(advanced_hits) * 20)
+        # CEFR level distribution of the vocabulary (informational, not part of the score)
+        level_counts = self.vocabulary_matcher.count_by_label(tokens)
 
         # TOTAL SCORE
         raw_score = (score_length * 0.3) + (score_diversity * 0.2) + (score_complexity * 0.2) + (relevance_score * 0.3)
@@ -181,7 +650,8 @@ class AIModule:
             "grammar_errors": [], 
             "suggestions": ["Try to use more 'academic vocabulary'.", "Extend your sentences with conjunctions."],
             "corrected_text": text,
-            "feedback_tr": feedback_tr
+            "feedback_tr": feedback_tr,
+            "vocabulary_levels": level_counts
         }
 
     # ----------------------------------------------------------------
@@ -189,7 +659,7 @@ class AIModule:
     # ----------------------------------------------------------------
     def speech_to_text(self, audio_path: str) -> str:
         # Hata mesajı sabiti
-        ERROR_MSG = "[The audio was unintelligible or there was a technical error. Please check your microphone and try again.]"
+        ERROR_MSG = STT_ERROR_MSG
 
         # 1. Dosya Var mı?
         if not os.path.exists(audio_path):
@@ -202,17 +672,55 @@ class AIModule:
             print("⚠️ Ses dosyası çok küçük (Boş kayıt).")
             return ERROR_MSG
 
-        # 3. Whisper ile Çeviri
-        if self.stt_model:
+        # 3. Aynı kayıt aynı modelle ve aynı yöntemle (tek geçiş / parçalı) daha önce çevrildiyse tekrar Whisper çalıştırma
+        from src.services.audio_preprocess import audio_preprocessor
+        from src.services.stt_pool import parallel_transcriber
+        audio_hash = audio_digest(audio_path)
+        model_version = f"{WHISPER_MODEL_NAME}|{audio_preprocessor.version}"
+
+        # Parçalı çeviri açıksa yöntem konuşma süresine bağlı: ses önce hazırlanır (önbellekte ise ucuz)
+        audio = None
+        prepared = False
+        mode = "single"
+        if parallel_transcriber.workers > 0:
+            audio = audio_preprocessor.prepare(audio_path)
+            prepared = True
+            if parallel_transcriber.accepts(audio):
+                mode = parallel_transcriber.mode
+
+        cached_text = transcript_cache.get(audio_hash, f"{model_version}|{mode}")
+        if cached_text is not None:
+            return cached_text
+
+        # 4. Whisper ile Çeviri
+        stt_model = self.stt_model
+        if stt_model:
+            # 16 kHz mono'ya bir kez çöz, sessizliği at (ffmpeg yoksa dosya doğrudan verilir)
+            if not prepared:
+                audio = audio_preprocessor.prepare(audio_path)
+            if audio is not None and audio.samples.size == 0:
+                print("⚠️ Kayıtta konuşma bulunamadı (sadece sessizlik).")
+                return ERROR_MSG
+
             try:
-                # fp16=False uyarısını susturmak için CPU modunda şart değil ama güvenli
-                result = self.stt_model.transcribe(audio_path, fp16=False)
+                # Uzun kayıtlar: sessizlik noktalarından bölünüp süreç havuzunda paralel çevrilir
+                result = None
+                if mode != "single":
+                    result = parallel_transcriber.transcribe(audio.samples, WHISPER_MODEL_NAME)
+
+                if result is None:
+                    mode = "single"  # Havuz başarısızsa tek geçiş sonucu kendi anahtarıyla saklanır
+                    # fp16=False uyarısını susturmak için CPU modunda şart değil ama güvenli
+                    with self.registry.stt_lock:
+                        result = stt_model.transcribe(audio.samples if audio is not None else audio_path, fp16=False)
                 text = result["text"].strip()
                 
                 # Eğer Whisper boş döndüyse
                 if not text: 
                     return ERROR_MSG
                 
+                # Sadece başarılı çeviriler saklanır (hata mesajı tekrar denenebilsin)
+                transcript_cache.set(audio_hash, f"{model_version}|{mode}", audio_path, text)
                 return text
             except Exception as e:
                 print(f"❌ Whisper Çeviri Hatası: {e}")
@@ -229,4 +737,18 @@ class AIModule:
             "suggestions": ["Please check your microphone.", "Speak clearly and loudly."], 
             "corrected_text": text, 
             "feedback_tr": error_msg 
-        }
\ No newline at end of file
+        }
+
+
+_shared_ai_module = None
+_shared_ai_lock = threading.Lock()
+
+def get_ai_module() -> AIModule:
+    """Returns the process-wide AIModule instance (created on first call)."""
+    global _shared_ai_module
+    if _shared_ai_module is None:
+        with _shared_ai_lock:
+            if _shared_ai_module is None:
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] 🤖 AI Module Starting (HYBRID MODE)...")
+                _shared_ai_module = AIModule()
+    return _shared_ai_module
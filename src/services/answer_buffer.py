@@ -0,0 +1,146 @@
+import os
+import threading
+
+from src.database import SessionLocal
+from src.repositories.exam_repo import ExamRepository
+
+# Autosaves from /submit-answer are buffered in memory and written in batches.
+# Durability bound: at most ANSWER_BUFFER_FLUSH_SECONDS of autosaves can be lost
+# if a worker dies (the final /submit always carries every answer anyway).
+# Off by default: each worker has its own buffer and /submit only flushes the
+# buffer of the worker that handles it.
+ANSWER_BUFFER_ENABLED = os.getenv("ANSWER_BUFFER_ENABLED", "0") == "1"
+ANSWER_BUFFER_FLUSH_SECONDS = float(os.getenv("ANSWER_BUFFER_FLUSH_SECONDS", "2"))
+# Flush early once this many (session, question) pairs are waiting
+ANSWER_BUFFER_MAX_PENDING = int(os.getenv("ANSWER_BUFFER_MAX_PENDING", "5000"))
+
+
+class AnswerBuffer:
+    """
+    Write-behind buffer for exam autosaves. Repeated saves of the same
+    (session, question) are coalesced; a background thread flushes them
+    with one bulk upsert per session.
+    """
+
+    def __init__(self, flush_seconds: float = ANSWER_BUFFER_FLUSH_SECONDS, max_pending: int = ANSWER_BUFFER_MAX_PENDING):
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}  # (session_id, question_id) -> answer dict
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.buffered_writes = 0
+        self.coalesced_writes = 0
+        self.flushed_rows = 0
+        self.flushes = 0
+        self.discarded_rows = 0
+        self.failed_flushes = 0
+
+    def add(self, session_id: int, question_id: int, selected_option_id: int = None, content: str = None):
+        with self._lock:
+            key = (session_id, question_id)
+            if key in self._pending:
+                self.coalesced_writes += 1
+            self._pending[key] = {
+                "question_id": question_id,
+                "selected_option_id": selected_option_id,
+                "content": content,
+            }
+            self.buffered_writes += 1
+            pending = len(self._pending)
+
+        self._ensure_started()
+        if pending >= self.max_pending:
+            self._wakeup.set()
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="answer-buffer", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self, session_id: int = None):
+        """Writes buffered answers (all, or only one session's) to the database."""
+        with self._flush_lock:
+            with self._lock:
+                if session_id is None:
+                    batch, self._pending = self._pending, {}
+                else:
+                    keys = [k for k in self._pending if k[0] == session_id]
+                    batch = {k: self._pending.pop(k) for k in keys}
+
+            if not batch:
+                return 0
+
+            by_session = {}
+            for (sid, _), row in batch.items():
+                by_session.setdefault(sid, []).append(row)
+
+            db = SessionLocal()
+            repo = ExamRepository(db)
+            written = 0
+            failed = 0
+            try:
+                # One transaction per session: the status check and the upsert happen under
+                # the session row lock, so a session being finalized is never written to
+                for sid, rows in by_session.items():
+                    try:
+                        if repo.lock_session(sid) != "IN_PROGRESS":
+                            db.rollback()
+                            self.discarded_rows += len(rows)
+                            continue
+                        repo.bulk_upsert_answers(sid, rows)  # commits
+                        written += len(rows)
+                    except Exception as e:
+                        db.rollback()
+                        failed += 1
+                        print(f"❌ Answer buffer flush error (session {sid}), will retry: {e}")
+                        # Only this session's rows go back, unless a newer save arrived meanwhile
+                        with self._lock:
+                            for row in rows:
+                                self._pending.setdefault((sid, row["question_id"]), row)
+
+                self.flushed_rows += written
+                self.flushes += 1
+                if failed:
+                    self.failed_flushes += 1
+                return written
+            finally:
+                db.close()
+
+    def stop(self):
+        """Final flush on shutdown."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": ANSWER_BUFFER_ENABLED,
+            "flush_seconds": self.flush_seconds,
+            "max_pending": self.max_pending,
+            "pending": len(self._pending),
+            "buffered_writes": self.buffered_writes,
+            "coalesced_writes": self.coalesced_writes,
+            "flushed_rows": self.flushed_rows,
+            "discarded_rows": self.discarded_rows,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+# Single buffer per worker process
+answer_buffer = AnswerBuffer()
@@ -0,0 +1,225 @@
+import os
+import threading
+import subprocess
+from collections import OrderedDict
+
+from src.services.ai_service import model_registry
+
+# Decode + silence trimming before Whisper (0 = hand the raw file to Whisper as before)
+AUDIO_PREPROCESS = os.getenv("AUDIO_PREPROCESS", "1") == "1"
+# Whisper works on 16 kHz mono; decoding once to that format skips its own ffmpeg pass
+SAMPLE_RATE = 16000
+# Energy VAD: frame length, threshold below the loudest frame, absolute floor (dBFS)
+AUDIO_VAD_FRAME_MS = int(os.getenv("AUDIO_VAD_FRAME_MS", "30"))
+AUDIO_VAD_THRESHOLD_DB = float(os.getenv("AUDIO_VAD_THRESHOLD_DB", "-35"))
+AUDIO_VAD_FLOOR_DB = float(os.getenv("AUDIO_VAD_FLOOR_DB", "-55"))
+# Audio kept around each speech frame, so word onsets and short pauses survive
+AUDIO_VAD_PAD_MS = int(os.getenv("AUDIO_VAD_PAD_MS", "300"))
+# Normalized buffer stored next to the recording: <recording>.pcm16k.npz
+CACHE_SUFFIX = ".pcm16k.npz"
+# Per-file savings kept for the status endpoint
+RECENT_FILES = 256
+
+
+class PreparedAudio:
+    """16 kHz mono float32 speech samples of a recording plus how much was trimmed."""
+
+    def __init__(self, samples, original_seconds: float, cached: bool = False):
+        self.samples = samples
+        self.original_seconds = original_seconds
+        self.cached = cached
+
+    @property
+    def speech_seconds(self) -> float:
+        return len(self.samples) / SAMPLE_RATE
+
+    @property
+    def dropped_seconds(self) -> float:
+        return max(0.0, self.original_seconds - self.speech_seconds)
+
+
+class AudioPreprocessor:
+    """
+    Decodes a recording once to 16 kHz mono PCM, drops leading/trailing silence
+    and long dead air with a vectorized energy VAD, and caches the result next
+    to the recording. Whisper then only sees speech.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._recent = OrderedDict()  # audio_path -> savings of that file
+        self.files = 0
+        self.cache_hits = 0
+        self.decode_failures = 0
+        self.seconds_in = 0.0
+        self.seconds_kept = 0.0
+
+    @property
+    def np(self):
+        # numpy comes with openai-whisper; imported on first use like the other AI libraries
+        return model_registry.import_module("numpy")
+
+    @staticmethod
+    def _params() -> list:
+        # Stored with the cache, so changing the VAD settings re-trims old recordings
+        return [AUDIO_VAD_FRAME_MS, AUDIO_VAD_THRESHOLD_DB, AUDIO_VAD_FLOOR_DB, AUDIO_VAD_PAD_MS]
+
+    @property
+    def version(self) -> str:
+        """Part of the transcript cache key: trimmed audio can transcribe differently."""
+        if not AUDIO_PREPROCESS or self.np is None:
+            return "raw"
+        return "vad:" + ",".join(str(p) for p in self._params())
+
+    # ---- decoding ----
+    def decode(self, audio_path: str):
+        """Decodes any ffmpeg-readable file to 16 kHz mono float32 (None if ffmpeg fails)."""
+        cmd = [
+            "ffmpeg", "-nostdin", "-threads", "0", "-i", audio_path,
+            "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "-"
+        ]
+        try:
+            pcm = subprocess.run(cmd, capture_output=True, check=True).stdout
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"⚠️ Audio decode failed ({audio_path}): {e}")
+            return None
+        samples = self.np.frombuffer(pcm, self.np.int16).astype(self.np.float32) / 32768.0
+        # DC offset of cheap microphones would otherwise raise the energy of silent frames
+        return samples - samples.mean() if samples.size else samples
+
+    # ---- VAD ----
+    def frame_energy_db(self, samples):
+        """Energy (dBFS) of every full AUDIO_VAD_FRAME_MS frame."""
+        np = self.np
+        frame = SAMPLE_RATE * AUDIO_VAD_FRAME_MS // 1000
+        n_frames = len(samples) // frame
+        frames = samples[:n_frames * frame].reshape(n_frames, frame)
+        return 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+
+    def speech_mask(self, samples):
+        """Per-frame speech flags (frame energy above threshold, widened by the pad)."""
+        np = self.np
+        energy_db = self.frame_energy_db(samples)
+        if energy_db.size == 0:
+            return np.zeros(0, dtype=bool)
+
+        threshold = max(energy_db.max() + AUDIO_VAD_THRESHOLD_DB, AUDIO_VAD_FLOOR_DB)
+        speech = energy_db > threshold
+
+        pad = AUDIO_VAD_PAD_MS // AUDIO_VAD_FRAME_MS
+        if pad and speech.any():
+            speech = np.convolve(speech, np.ones(2 * pad + 1), mode="same") > 0
+        return speech
+
+    def trim(self, samples):
+        """Keeps only speech frames (plus padding); empty array for a silent recording."""
+        mask = self.speech_mask(samples)
+        frame = SAMPLE_RATE * AUDIO_VAD_FRAME_MS // 1000
+        return samples[:len(mask) * frame].reshape(-1, frame)[mask].reshape(-1)
+
+    def split(self, samples, target_seconds: float, search_seconds: float):
+        """
+        Cuts samples into chunks of about target_seconds, each cut placed on the
+        quietest frame of the search_seconds before the target, so words are not
+        split. Returns [(offset_seconds, chunk), ...] in order.
+        """
+        np = self.np
+        frame = SAMPLE_RATE * AUDIO_VAD_FRAME_MS // 1000
+        energy_db = self.frame_energy_db(samples)
+        target = max(1, int(target_seconds * 1000) // AUDIO_VAD_FRAME_MS)
+        search = max(1, min(target - 1, int(search_seconds * 1000) // AUDIO_VAD_FRAME_MS))
+
+        cuts = [0]
+        while len(energy_db) - cuts[-1] > target + search:
+            window_start = cuts[-1] + target - search
+            cuts.append(window_start + int(np.argmin(energy_db[window_start:cuts[-1] + target])))
+        bounds = [c * frame for c in cuts] + [len(samples)]
+        return [(bounds[i] / SAMPLE_RATE, samples[bounds[i]:bounds[i + 1]]) for i in range(len(cuts))]
+
+    # ---- cache ----
+    def _load_cached(self, audio_path: str):
+        cache_path = audio_path + CACHE_SUFFIX
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with self.np.load(cache_path) as data:
+                if data["params"].tolist() != self._params():
+                    return None
+                samples = data["samples"].astype(self.np.float32) / 32768.0
+                return PreparedAudio(samples, float(data["original_seconds"]), cached=True)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _store(self, audio_path: str, prepared: PreparedAudio):
+        # int16 halves the size; written to a temp name so readers never see half a file
+        cache_path = audio_path + CACHE_SUFFIX
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        pcm = (self.np.clip(prepared.samples, -1.0, 1.0) * 32767).astype(self.np.int16)
+        try:
+            with open(tmp_path, "wb") as f:
+                self.np.savez(f, samples=pcm, original_seconds=prepared.original_seconds, params=self._params())
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"⚠️ Could not cache normalized audio ({audio_path}): {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    # ---- entry point ----
+    def prepare(self, audio_path: str):
+        """
+        Speech-only 16 kHz buffer of a recording, from the cache when possible.
+        Returns None when preprocessing is off or impossible (caller uses the file).
+        """
+        if not AUDIO_PREPROCESS or self.np is None:
+            return None
+
+        prepared = self._load_cached(audio_path)
+        if prepared is None:
+            samples = self.decode(audio_path)
+            if samples is None:
+                with self._lock:
+                    self.decode_failures += 1
+                return None
+            prepared = PreparedAudio(self.trim(samples), len(samples) / SAMPLE_RATE)
+            self._store(audio_path, prepared)
+
+        self._record(audio_path, prepared)
+        return prepared
+
+    def _record(self, audio_path: str, prepared: PreparedAudio):
+        with self._lock:
+            self.files += 1
+            self.cache_hits += prepared.cached
+            self.seconds_in += prepared.original_seconds
+            self.seconds_kept += prepared.speech_seconds
+            self._recent[audio_path] = {
+                "original_seconds": round(prepared.original_seconds, 2),
+                "speech_seconds": round(prepared.speech_seconds, 2),
+                "dropped_seconds": round(prepared.dropped_seconds, 2),
+            }
+            self._recent.move_to_end(audio_path)
+            while len(self._recent) > RECENT_FILES:
+                self._recent.popitem(last=False)
+
+        if not prepared.cached:
+            print(f"🔇 {os.path.basename(audio_path)}: {prepared.original_seconds:.1f}s -> "
+                  f"{prepared.speech_seconds:.1f}s ({prepared.dropped_seconds:.1f}s silence dropped)")
+
+    def stats(self, audio_path: str = None) -> dict:
+        with self._lock:
+            result = {
+                "enabled": AUDIO_PREPROCESS,
+                "files": self.files,
+                "cache_hits": self.cache_hits,
+                "decode_failures": self.decode_failures,
+                "seconds_in": round(self.seconds_in, 1),
+                "seconds_kept": round(self.seconds_kept, 1),
+                "seconds_dropped": round(self.seconds_in - self.seconds_kept, 1),
+            }
+            if audio_path is not None:
+                result["recording"] = self._recent.get(audio_path)
+            return result
+
+
+# Single preprocessor per worker process
+audio_preprocessor = AudioPreprocessor()
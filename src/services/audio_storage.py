@@ -0,0 +1,193 @@
+import os
+import time
+import uuid
+import hashlib
+import threading
+import subprocess
+from contextlib import contextmanager
+
+from fastapi import HTTPException
+
+try:
+    import fcntl
+except ImportError:  # Windows: chunks of one upload are only serialized within a worker
+    fcntl = None
+
+# Recordings live under src/static/uploads/<aa>/<bb>/<sha256>.webm (content-addressed,
+# sharded so no directory grows past a few thousand entries)
+AUDIO_UPLOAD_DIR = os.getenv("AUDIO_UPLOAD_DIR", "src/static/uploads")
+AUDIO_PUBLIC_PREFIX = "/static/uploads"
+AUDIO_CHUNK_BYTES = int(os.getenv("AUDIO_CHUNK_BYTES", str(1024 * 1024)))
+AUDIO_MAX_BYTES = int(os.getenv("AUDIO_MAX_BYTES", str(20 * 1024 * 1024)))
+# Checked with ffprobe when available (0 = no limit)
+AUDIO_MAX_SECONDS = float(os.getenv("AUDIO_MAX_SECONDS", "300"))
+# Unfinished resumable uploads are removed after this long
+AUDIO_UPLOAD_TTL_SECONDS = int(os.getenv("AUDIO_UPLOAD_TTL_SECONDS", "3600"))
+AUDIO_EXTENSIONS = {".webm", ".ogg", ".wav", ".mp3", ".m4a"}
+
+
+def audio_extension(filename: str) -> str:
+    """Extension to store the recording with (browser recordings default to .webm)."""
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if ext in AUDIO_EXTENSIONS else ".webm"
+
+
+def probe_duration(path: str):
+    """Duration in seconds via ffprobe, or None if unknown (no ffprobe / no duration in header)."""
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+            capture_output=True, text=True, timeout=10
+        ).stdout.strip()
+        return float(out)
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+
+class AudioStorage:
+    """
+    Streaming, size-limited storage for exam recordings. Single-shot uploads
+    and resumable chunked uploads both end in the same content-addressed file,
+    so identical recordings are stored once.
+    """
+
+    def __init__(self, root: str = AUDIO_UPLOAD_DIR, max_bytes: int = AUDIO_MAX_BYTES, chunk_bytes: int = AUDIO_CHUNK_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.chunk_bytes = chunk_bytes
+        self.tmp_dir = os.path.join(root, "tmp")
+        # Striped locks for the threads of this worker; flock covers the other workers
+        self._locks = [threading.Lock() for _ in range(64)]
+
+    # ---- paths ----
+    def _part_path(self, upload_id: str) -> str:
+        # upload_id comes from the client: only our own uuid hex format is accepted
+        if len(upload_id) != 32 or any(c not in "0123456789abcdef" for c in upload_id):
+            raise HTTPException(404, "Upload not found.")
+        return os.path.join(self.tmp_dir, f"{upload_id}.part")
+
+    def _final_path(self, digest: str, ext: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], f"{digest}{ext}")
+
+    def _public_url(self, digest: str, ext: str) -> str:
+        return f"{AUDIO_PUBLIC_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+    # ---- writing ----
+    def _copy_limited(self, src, dst, written: int = 0, hasher=None) -> int:
+        """Copies src into dst chunk by chunk; raises 413 past max_bytes."""
+        while True:
+            chunk = src.read(self.chunk_bytes)
+            if not chunk:
+                return written
+            written += len(chunk)
+            if written > self.max_bytes:
+                raise HTTPException(413, f"Recording is too large (max {self.max_bytes // (1024 * 1024)} MB).")
+            if hasher is not None:
+                hasher.update(chunk)
+            dst.write(chunk)
+
+    def _publish(self, tmp_path: str, digest: str, ext: str) -> str:
+        """Checks the duration and moves the temp file to its content address."""
+        if AUDIO_MAX_SECONDS:
+            duration = probe_duration(tmp_path)
+            if duration is not None and duration > AUDIO_MAX_SECONDS:
+                os.remove(tmp_path)
+                raise HTTPException(413, f"Recording is too long (max {int(AUDIO_MAX_SECONDS)} seconds).")
+
+        final_path = self._final_path(digest, ext)
+        if os.path.exists(final_path):
+            os.remove(tmp_path)  # Same recording already stored
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(tmp_path, final_path)
+        return self._public_url(digest, ext)
+
+    def save_stream(self, fileobj, ext: str = ".webm") -> str:
+        """Single-shot upload: streams to a temp file while hashing. Returns the public URL."""
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        tmp_path = os.path.join(self.tmp_dir, f"{uuid.uuid4().hex}.upload")
+        hasher = hashlib.sha256()
+        try:
+            with open(tmp_path, "wb") as out:
+                self._copy_limited(fileobj, out, hasher=hasher)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return self._publish(tmp_path, hasher.hexdigest(), ext)
+
+    # ---- resumable uploads ----
+    def start_upload(self) -> str:
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self._cleanup_stale()
+        upload_id = uuid.uuid4().hex
+        open(self._part_path(upload_id), "wb").close()
+        return upload_id
+
+    def upload_offset(self, upload_id: str) -> int:
+        """Bytes received so far (the client resumes from here)."""
+        path = self._part_path(upload_id)
+        if not os.path.exists(path):
+            raise HTTPException(404, "Upload not found.")
+        return os.path.getsize(path)
+
+    @contextmanager
+    def _locked(self, upload_id: str):
+        """Exclusive access to one upload's part file, across threads and worker processes."""
+        path = self._part_path(upload_id)
+        with self._locks[hash(upload_id) % len(self._locks)]:
+            if fcntl is None:
+                yield path
+                return
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                raise HTTPException(404, "Upload not found.")
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                yield path
+            finally:
+                os.close(fd)  # Releases the flock
+
+    def append_chunk(self, upload_id: str, offset: int, fileobj) -> int:
+        """Appends a chunk at offset. A retried/duplicate chunk gets 409 with the current offset."""
+        with self._locked(upload_id) as path:
+            # Checked under the lock: a parallel retry of the same chunk sees the new size
+            current = self.upload_offset(upload_id)
+            if offset != current:
+                raise HTTPException(409, detail={"msg": "Offset mismatch.", "offset": current})
+            with open(path, "ab") as out:
+                try:
+                    return self._copy_limited(fileobj, out, written=current)
+                except BaseException:
+                    # A failed chunk leaves nothing behind, so the client can resend it at the same offset
+                    out.truncate(current)
+                    raise
+
+    def complete_upload(self, upload_id: str, ext: str = ".webm") -> str:
+        with self._locked(upload_id) as path:
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                raise HTTPException(400, "Upload is empty or unknown.")
+
+            # Chunks may arrive on different workers, so the hash is computed once at the end
+            hasher = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(self.chunk_bytes), b""):
+                    hasher.update(chunk)
+            # Sealed under the lock: a chunk still waiting for it finds no upload (404)
+            sealed_path = os.path.join(self.tmp_dir, f"{uuid.uuid4().hex}.upload")
+            os.replace(path, sealed_path)
+        return self._publish(sealed_path, hasher.hexdigest(), ext)
+
+    def _cleanup_stale(self):
+        cutoff = time.time() - AUDIO_UPLOAD_TTL_SECONDS
+        for entry in os.scandir(self.tmp_dir):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+
+# Single storage per worker process
+audio_storage = AudioStorage()
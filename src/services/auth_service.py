@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
 import random
 
 # IMPORTLAR
@@ -8,12 +8,12 @@ from src.models.user import User
 from src.repositories.user_repo import UserRepository
 # Sadece gerekli şemaları import ediyoruz (UserPasswordUpdate YOK)
 from src.schemas.auth import UserCreate, UserLogin, UserUpdate
+from src.services.password_service import password_hasher
 
 class AccountService:
     def __init__(self, db: Session):
         self.db = db
         self.repo = UserRepository(db)
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
     def create_account(self, data: UserCreate):
         """
@@ -24,7 +24,7 @@ class AccountService:
             raise HTTPException(400, "Email already exists")
         
         # 2. Şifre Hashleme
-        hashed = self.pwd_context.hash(data.password)
+        hashed = password_hasher.hash(data.password)
         
         # 3. Öğrenci Numarası oluşturma
         st_num = data.student_number or f"ST-{random.randint(10000,99999)}"
@@ -32,6 +32,18 @@ class AccountService:
         # 4. Repository'e gönder (User -> Student -> LevelRecord oluşturulacak)
         return self.repo.create_student(data, hashed, st_num)
 
+    async def create_account_async(self, data: UserCreate):
+        """
+        create_account for async routes: DB calls on the threadpool, bcrypt on the
+        hashing executor (no request thread is held while hashing).
+        """
+        if await run_in_threadpool(self.repo.check_email, data.email):
+            raise HTTPException(400, "Email already exists")
+
+        hashed = await password_hasher.hash_async(data.password)
+        st_num = data.student_number or f"ST-{random.randint(10000,99999)}"
+        return await run_in_threadpool(self.repo.create_student, data, hashed, st_num)
+
     def login(self, data: UserLogin):
         """
         FR-1: Kullanıcı girişi.
@@ -39,17 +51,30 @@ class AccountService:
         u = self.repo.find_user_by_email(data.email)
         
         # 1. Kullanıcı Var mı ve Şifre Doğru mu?
-        if not u or not self.pwd_context.verify(data.password, u.password_hash):
+        if not u or not password_hasher.verify(data.password, u.password_hash):
             raise HTTPException(401, "Incorrect email or password.")
         
         # 2. HESAP AKTİF Mİ? (FR-18)
+        self._check_active(u)
+        return u
+
+    async def login_async(self, data: UserLogin):
+        """login for async routes (same checks, bcrypt on the hashing executor)."""
+        u = await run_in_threadpool(self.repo.find_user_by_email, data.email)
+
+        if not u or not await password_hasher.verify_async(data.password, u.password_hash):
+            raise HTTPException(401, "Incorrect email or password.")
+
+        self._check_active(u)
+        return u
+
+    @staticmethod
+    def _check_active(u: User):
         if not u.is_active:
-                       raise HTTPException(
+            raise HTTPException(
                 status_code=403, 
                 detail="Your account has been suspended by the administrator. Please contact support."
             )
-            
-        return u
 
     # =========================================================================
     # FR-2: PROFİL YÖNETİMİ
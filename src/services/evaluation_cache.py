@@ -0,0 +1,158 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+# In-memory tier (per worker)
+EVAL_CACHE_MAX_ENTRIES = int(os.getenv("EVAL_CACHE_MAX_ENTRIES", "2000"))
+EVAL_CACHE_TTL_SECONDS = int(os.getenv("EVAL_CACHE_TTL_SECONDS", "3600"))
+# Persistent tier (shared by all workers on the host)
+EVAL_CACHE_PATH = os.getenv("EVAL_CACHE_PATH", "data/ai_cache.sqlite3")
+EVAL_CACHE_DISK_TTL_SECONDS = int(os.getenv("EVAL_CACHE_DISK_TTL_SECONDS", str(30 * 24 * 3600)))
+
+
+def make_evaluation_key(text: str, topic: str, level: str, keywords: list, version: str) -> str:
+    """Content hash of everything that can change the grading result."""
+    payload = {
+        "text": " ".join((text or "").split()),
+        "topic": " ".join((topic or "").split()).lower(),
+        "level": (level or "").upper(),
+        "keywords": sorted({k.strip().lower() for k in (keywords or []) if k and k.strip()}),
+        "version": version,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class EvaluationCache:
+    """
+    Two-tier cache for AI writing evaluations: an LRU dict with TTL in front of
+    a local SQLite file. Entries written under another prompt/model version are
+    dropped when the cache is opened.
+    """
+
+    def __init__(self, version: str, path: str = EVAL_CACHE_PATH,
+                 max_entries: int = EVAL_CACHE_MAX_ENTRIES, ttl_seconds: int = EVAL_CACHE_TTL_SECONDS):
+        self.version = version
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        # Guards only the in-memory LRU; SQLite I/O runs outside it on per-thread connections
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    # --- Persistent tier ---
+    def _db(self):
+        """SQLite connection of the calling thread (None when the disk tier is disabled)."""
+        if not self.path:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS evaluation_cache ("
+                        " cache_key TEXT PRIMARY KEY, version TEXT NOT NULL,"
+                        " result TEXT NOT NULL, created_at REAL NOT NULL)"
+                    )
+                    # Prompt template / model changed -> old results are no longer valid
+                    conn.execute("DELETE FROM evaluation_cache WHERE version != ?", (self.version,))
+                    conn.commit()
+                    self._schema_ready = True
+            self._local.conn = conn
+            return conn
+        except sqlite3.Error as e:
+            print(f"⚠️ Evaluation cache disabled (SQLite error): {e}")
+            self.path = None
+            return None
+
+    def _remember(self, key: str, value: dict):
+        # Caller holds self._lock
+        self._memory[key] = (time.time() + self.ttl_seconds, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry:
+                expires_at, value = entry
+                if expires_at > time.time():
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return dict(value)
+                del self._memory[key]
+
+        row = None
+        conn = self._db()
+        if conn is not None:
+            try:
+                row = conn.execute(
+                    "SELECT result FROM evaluation_cache WHERE cache_key = ? AND version = ? AND created_at > ?",
+                    (key, self.version, time.time() - EVAL_CACHE_DISK_TTL_SECONDS)
+                ).fetchone()
+            except sqlite3.Error:
+                row = None
+
+        with self._lock:
+            if row:
+                value = json.loads(row[0])
+                self._remember(key, value)
+                self.disk_hits += 1
+                return dict(value)
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: dict):
+        with self._lock:
+            self._remember(key, dict(value))
+            self.stores += 1
+
+        conn = self._db()
+        if conn is not None:
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO evaluation_cache (cache_key, version, result, created_at) VALUES (?, ?, ?, ?)",
+                    (key, self.version, json.dumps(value), time.time())
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Evaluation cache write error: {e}")
+
+    def invalidate(self):
+        """Drops every cached evaluation (both tiers)."""
+        with self._lock:
+            self._memory.clear()
+        conn = self._db()
+        if conn is not None:
+            conn.execute("DELETE FROM evaluation_cache")
+            conn.commit()
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "version": self.version,
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+        }
@@ -1,20 +1,37 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
 from fastapi import HTTPException, UploadFile
-import os, shutil
+import os
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 from src.repositories.exam_repo import ExamRepository
-from src.services.ai_service import AIModule
+from src.repositories.stats_repo import StudentStatsRepository
+from src.services.report_service import ReportService, level_for_score, level_feedback_line
+from src.services.ai_service import get_ai_module, GEMINI_BATCH_SIZE
+from src.utils.resilience import Deadline
+from src.services.transcription_service import transcription_queue
+from src.services.audio_storage import audio_storage, audio_extension
+from src.services.answer_buffer import answer_buffer, ANSWER_BUFFER_ENABLED
+from src.services.grading import GradingItem, grade_objective
 
 # Sınav Süresi (Dakika)
 DEFAULT_EXAM_DURATION = 20 
 
+# Aynı anda değerlendirilebilecek açık uçlu cevap sayısı (Gemini çağrıları için üst sınır)
+AI_GRADING_CONCURRENCY = int(os.getenv("AI_GRADING_CONCURRENCY", "8"))
+# Açık uçlu cevapları tek tek değil, gruplar halinde (tek Gemini isteği) değerlendir
+AI_BATCH_GRADING = os.getenv("AI_BATCH_GRADING", "0") == "1"
+# Bir sınavın AI değerlendirmesi için toplam süre bütçesi (saniye); aşılırsa kural tabanlı puan
+AI_GRADING_DEADLINE_SECONDS = float(os.getenv("AI_GRADING_DEADLINE_SECONDS", "30"))
+
 class ExamService:
     def __init__(self, db: Session):
         self.db = db
         self.repo = ExamRepository(db)
-        self.ai = AIModule() # AI Modülünü Başlat
+        self.stats_repo = StudentStatsRepository(db)
+        self.reports = ReportService(db)
+        self.ai = get_ai_module() # Paylaşılan AI Modülü (modeller süreç başına bir kez yüklenir)
 
     def start_exam_session(self, user_id: int, skill: str, level: str):
         """
@@ -43,7 +60,7 @@ class ExamService:
         if active_session:
             # A) Süre dolmuş mu?
             if active_session.end_time and datetime.now() > active_session.end_time:
-                self.repo.mark_session_expired(active_session)
+                self._expire(active_session)
             else:
                 # B) Süre hala var -> Kaldığı yerden devam et
                 questions = self.repo.get_questions_by_skill(skill, level)
@@ -63,6 +80,44 @@ class ExamService:
         """
         Cevabı kaydeder. ÖNCE SÜRE KONTROLÜ YAPAR.
         """
+        if not ANSWER_BUFFER_ENABLED:
+            # Gönderim ile aynı satır kilidi: gönderimden sonra gelen eski otomatik kayıt yazılmaz
+            self.repo.lock_session(session_id)
+        self._get_writable_session(session_id)
+
+        # C) Kayıt (otomatik kayıtlar tamponlanır, toplu halde yazılır)
+        if ANSWER_BUFFER_ENABLED:
+            answer_buffer.add(session_id, question_id, selected_option_id, text_response)
+        else:
+            self.repo.save_answer(session_id, question_id, selected_option_id, text_response)
+
+    def save_answers(self, session_id: int, answers: list):
+        """
+        Sınav gönderiminde tüm cevapları tek seferde kaydeder (oturum bir kez kontrol edilir, tek transaction).
+        """
+        # Bu oturumun tampondaki otomatik kayıtları önce yazılır, gönderilen cevaplar üzerine yazar
+        answer_buffer.flush(session_id)
+
+        # Kilit -> kontrol -> yazma -> GRADING tek transaction'da; commit kilidi puanlamadan önce bırakır.
+        # Başka worker'daki gecikmiş otomatik kayıtlar bundan sonra oturumu IN_PROGRESS görmez.
+        status = self.repo.lock_session(session_id)
+        if status == "GRADING" or (status != "IN_PROGRESS" and not answers):
+            # Yarım kalmış puanlama / cevapsız tekrar değerlendirme: kayıtlı cevaplar puanlanır
+            self.db.rollback()
+            return
+        self._get_writable_session(session_id)
+        self.repo.bulk_upsert_answers(session_id, [
+            {
+                "question_id": ans.question_id,
+                "selected_option_id": ans.selected_option_id,
+                "content": ans.text_response
+            }
+            for ans in answers
+        ], commit=False)
+        self.repo.mark_session_grading(session_id)
+        self.db.commit()
+
+    def _get_writable_session(self, session_id: int):
         session = self.repo.get_session(session_id)
         if not session:
             raise HTTPException(404, "Exam session not found.")
@@ -73,116 +128,112 @@ class ExamService:
 
         # B) Süre Kontrolü
         if session.end_time and datetime.now() > session.end_time:
-            self.repo.mark_session_expired(session)
+            self._expire(session)
             raise HTTPException(400, "Exam time is up! Your answer was not saved.")
 
-        # C) Kayıt
-        self.repo.save_answer(session_id, question_id, selected_option_id, text_response)
+        return session
+
+    def _expire(self, session):
+        # Süresi dolan oturumun raporu da burada yazılır (detay sayfası tek satır okur)
+        self.repo.mark_session_expired(session)
+        self.reports.save_session_report(session)
+        self.db.commit()
 
     def save_audio(self, file: UploadFile):
-        os.makedirs("src/static/uploads", exist_ok=True)
-        filename = f"rec_{datetime.now().timestamp()}.webm"
-        file_path = f"src/static/uploads/{filename}"
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        return f"/static/uploads/{filename}"
+        # Parça parça yazılır, yazarken hash'lenir; aynı kayıt tek dosya olarak saklanır
+        audio_url = audio_storage.save_stream(file.file, audio_extension(file.filename))
+        return self._queue_transcription(audio_url)
+
+    def complete_audio_upload(self, upload_id: str, filename: str = None):
+        """Parçalı (devam ettirilebilir) yüklemenin son adımı."""
+        audio_url = audio_storage.complete_upload(upload_id, audio_extension(filename))
+        return self._queue_transcription(audio_url)
+
+    def _queue_transcription(self, audio_url: str):
+        # Öğrenci sınava devam ederken transkripsiyonu arka planda başlat
+        transcription_queue.submit(audio_url)
+        return audio_url
 
     def finalize_exam(self, session_id: int, skill_name: str = None):
-        session = self.repo.get_session(session_id)
-        if not session: raise HTTPException(404, "Session not found")
+        # Puanlama kilitsiz çalışır (save_answers oturumu GRADING yaptı); kilit yalnızca sonuç yazılırken alınır
+        # Oturum + cevaplar + sorular + seçenekler tek sorguda (N+1 yok)
+        plan = self.repo.get_grading_plan(session_id)
+        if not plan: raise HTTPException(404, "Session not found")
+        session = plan.session
         
         scores = {}
         detected_speech_text = ""
         gemini_feedback_list = [] # Gemini'den gelen özel yorumları biriktirmek için
+        items = []  # GradingItem listesi - cevap sırasıyla
+
+        #  A. HAZIRLIK: cevap metinleri (Speaking için önce transkripsiyon)
+        # content: yeni gönderilen kayıt URL'si; tekrar değerlendirmede transkripti tutar,
+        # kaydın kendisi audio_path'te kalır
+        speaking_audio = {
+            ans.answer_id: ans.content if (ans.content or "").startswith("/static/") else ans.audio_path
+            for ans in plan.answers
+            if ans.question.type != "MULTIPLE_CHOICE" and (ans.question.skill_category or "WRITING").upper() == "SPEAKING"
+        }
+        # Yükleme sırasında arka planda hazırlanan transkriptler, hepsi tek süre sınırıyla beklenir.
+        # Kuyrukta olmayan kayıtlar da kuyruğa girer: Whisper burada ayrıca çalıştırılmaz
+        queued_transcripts = transcription_queue.get_transcripts([p for p in speaking_audio.values() if p])
 
-        #  A. SORULARI PUANLA 
-        for ans in session.answers:
+        for ans in plan.answers:
             q = ans.question
-            score = 0.0
-            is_answer_correct = False # Varsayılan yanlış
-
-            if q.type == "MULTIPLE_CHOICE":
-                correct_opt = next((o for o in q.options if o.is_correct), None)
-                if correct_opt and ans.selected_option_id == correct_opt.option_id:
-                    score = 100.0
-                    is_answer_correct = True
-    
-            else:
-                # Kullanıcı cevabını al (Text veya daha önce kaydedilmiş content)
-                user_text = (ans.content or ans.text_response or "").strip()
-                skill_cat = (q.skill_category or "WRITING").upper()
-
-                #  SPEAKING: Önce Transkribe Etme
-                if skill_cat == "SPEAKING":
-                    audio_path = ans.content or ans.audio_path
-                    if audio_path:
-                        # Full path oluştur
-                        full_path = f"src{audio_path}" if audio_path.startswith("/static") else audio_path
-                        
-                        # AI Servisini Çağır (Ses -> Metin)
-                        transcribed_text = self.ai.speech_to_text(full_path)
-                        
-                        # Transkripti kaydet ki analizde görünsün
-                        ans.content = transcribed_text 
-                        user_text = transcribed_text
-                        detected_speech_text = transcribed_text
-                    else:
-                        user_text = ""
-
-                #  DEĞERLENDİRME (HİBRİT AI SİSTEMİ) 
-                
-                # A) KESİN CEVAP VARSA (Reading/Listening boşluk doldurma)
-                correct_text_opt = next((o for o in q.options if o.is_correct), None)
-                
-                if correct_text_opt:
-                    # String Normalizasyonu (Küçük harf, boşluk silme)
-                    correct_text = correct_text_opt.content.strip().lower()
-                    user_text_norm = user_text.strip().lower()
-                    
-                    if user_text_norm == correct_text:
-                        score = 100.0
-                        is_answer_correct = True
-                    else:
-                        score = 0.0
-                
-                # B) AI ANALİZİ (Essay / Speaking / Yorum Sorusu) - HİBRİT ÇAĞRI
+            # Kullanıcı cevabını al (Text veya daha önce kaydedilmiş content)
+            user_text = (ans.content or "").strip() if q.type != "MULTIPLE_CHOICE" else ""
+
+            if ans.answer_id in speaking_audio:
+                audio_path = speaking_audio[ans.answer_id]
+                if audio_path:
+                    ans.audio_path = audio_path
+                    # Süresinde çevrilemeyen kayıt STT_ERROR_MSG ile puanlanır
+                    transcribed_text = queued_transcripts[audio_path]
+
+                    # Transkripti kaydet ki analizde görünsün
+                    ans.content = transcribed_text 
+                    user_text = transcribed_text
+                    detected_speech_text = transcribed_text
                 else:
-                    if user_text:
-                        # Gerekli verileri hazırla
-                        topic = q.text if q.text else "General Task"
-                        # Keywords listesini hazırla (Eski algoritma için şart!)
-                        k_list = [k.strip() for k in q.keywords.split(",")] if q.keywords else []
-                        
-                        # session.difficulty kontrolü
-                        exam_level = getattr(session, "difficulty", None) or getattr(session, "difficulty_level", "A1")
-                        
-                        # HİBRİT FONKSİYONU ÇAĞIR 
-                        analysis = self.ai.evaluate_writing_hybrid(
-                            text=user_text,
-                            topic=topic,
-                            level=exam_level,
-                            keywords=k_list # Bu parametre eklendi!
-                        )
-                        
-                        score = float(analysis.get("score", 0))
-                        is_answer_correct = (score >= 60)
-                        
-                        # Gemini'den veya Sistemden gelen yorumu kaydet
-                        if analysis.get("feedback_tr"):
-                            gemini_feedback_list.append(analysis["feedback_tr"])
-                            
-                    else:
-                        score = 0.0
-
-            # SONUÇLARI KAYDET
-            ans.is_correct = is_answer_correct # DB'ye yaz (Yeşil/Kırmızı rozet için)
+                    user_text = ""
+
+            items.append(GradingItem(answer=ans, question=q, text=user_text))
+
+        #  B. OBJEKTİF PUANLAMA: cevap anahtarı ile tek geçiş (çoktan seçmeli + boşluk doldurma)
+        open_ended = grade_objective(items, plan.answer_keys)
+
+        #  C. AI DEĞERLENDİRME AŞAMASI (Essay / Speaking / Yorum Sorusu) - Eşzamanlı, sınırlı
+        # session.difficulty kontrolü
+        exam_level = getattr(session, "difficulty", None) or getattr(session, "difficulty_level", "A1")
+        analyses = self._evaluate_open_ended([
+            {
+                "text": item.text,
+                "topic": item.question.text if item.question.text else "General Task",
+                "level": exam_level,
+                # Keywords listesi (Eski algoritma için şart!)
+                "keywords": [k.strip() for k in item.question.keywords.split(",")] if item.question.keywords else []
+            }
+            for item in open_ended
+        ])
+        for item, analysis in zip(open_ended, analyses):
+            item.score = float(analysis.get("score", 0))
+            item.is_correct = (item.score >= 60)
+            # Gemini'den veya Sistemden gelen yorum
+            item.feedback = analysis.get("feedback_tr")
+
+        #  D. SONUÇLARI KAYDET
+        for item in items:
+            item.answer.is_correct = item.is_correct # DB'ye yaz (Yeşil/Kırmızı rozet için)
+
+            if item.feedback:
+                gemini_feedback_list.append(item.feedback)
             
             # Puanları kategoriye göre topla
-            skill_key = q.skill_category or "General"
+            skill_key = item.question.skill_category or "General"
             if skill_key in scores:
-                scores[skill_key] = (scores[skill_key] + score) / 2
+                scores[skill_key] = (scores[skill_key] + item.score) / 2
             else:
-                scores[skill_key] = score
+                scores[skill_key] = item.score
                 
         # Hiç cevap yoksa varsayılan puan
         if not scores and skill_name:
@@ -195,27 +246,26 @@ class ExamService:
         else:
             overall_score = 0.0
 
+        # Sonuç yazılırken satır kilitlenir ve güncel durum okunur: aynı anda iki gönderim
+        # olursa ikincisi ilkinin puanını görür (istatistiklerde iki kez sayılmaz)
+        self.db.refresh(session, attribute_names=["status", "overall_score"], with_for_update=True)
+        previous_score = session.overall_score if session.status == "COMPLETED" else None
+
         session.overall_score = overall_score
         session.status = "COMPLETED"
         session.end_time = datetime.now()
         
         # Seviye Belirle
-        detected_level = "A1"
-        if overall_score >= 85: detected_level = "C1"
-        elif overall_score >= 70: detected_level = "B2"
-        elif overall_score >= 50: detected_level = "B1"
-        elif overall_score >= 30: detected_level = "A2"
+        detected_level = level_for_score(overall_score)
         session.detected_level = detected_level 
 
         #   Level Record ve  feedback Güncelle 
         self._update_level_record(session.student_id, scores, detected_level)
+        # Öğrenci istatistikleri (dashboard / profil) aynı transaction'da güncellenir
+        self.stats_repo.record_result(session, list(scores.keys())[0] if scores else None, previous_score)
 
         # Feedback Metni Oluşturma
-        fb_text = ""
-        if overall_score >= 85: fb_text = "🏆 Excellent! Your level is in the C1-C2 range."
-        elif overall_score >= 70: fb_text = "✅ Very good. You're at B2 level."
-        elif overall_score >= 50: fb_text = "📈 Average. You're at B1 level."
-        else: fb_text = "⚠️ Needs improvement. You are at A1-A2 level."
+        fb_text = level_feedback_line(overall_score)
 
         # Gemini Yorumlarını Ekle
         if gemini_feedback_list:
@@ -226,6 +276,8 @@ class ExamService:
         
         try:
             session.ai_feedback = fb_text
+            # Analiz sayfası için hazır rapor (detay isteği tek satır okur)
+            self.reports.save_report(session, plan.answers, scores, fb_text, plan.answer_keys)
             # session.status = "COMPLETED" 
             self.db.commit()
             print(f"✅ Successfully recorded: Session {session_id}")
@@ -239,6 +291,47 @@ class ExamService:
             "breakdown": scores
         }
 
+    def _evaluate_open_ended(self, jobs: list) -> list:
+        """
+        Runs the hybrid AI evaluation for all open-ended answers concurrently.
+        Results come back in the same order as the jobs.
+        """
+        if not jobs:
+            return []
+
+        deadline = Deadline(AI_GRADING_DEADLINE_SECONDS)
+
+        if AI_BATCH_GRADING and len(jobs) > 1:
+            return self._evaluate_in_batches(jobs, deadline)
+
+        if len(jobs) == 1 or AI_GRADING_CONCURRENCY <= 1:
+            return [self._safe_evaluate(params, deadline) for params in jobs]
+
+        with ThreadPoolExecutor(max_workers=min(AI_GRADING_CONCURRENCY, len(jobs)), thread_name_prefix="grader") as pool:
+            return list(pool.map(lambda params: self._safe_evaluate(params, deadline), jobs))
+
+    def _evaluate_in_batches(self, jobs: list, deadline: Deadline = None) -> list:
+        """Packs the jobs into Gemini batches and sends the batches concurrently."""
+        size = max(1, GEMINI_BATCH_SIZE)
+        chunks = [jobs[i:i + size] for i in range(0, len(jobs), size)]
+
+        def _run(chunk):
+            try:
+                return self.ai.evaluate_writing_batch(chunk, deadline=deadline)
+            except Exception as e:
+                print(f"❌ Batch evaluation error, grading individually: {e}")
+                return [self._safe_evaluate(params, deadline) for params in chunk]
+
+        with ThreadPoolExecutor(max_workers=max(1, min(AI_GRADING_CONCURRENCY, len(chunks))), thread_name_prefix="grader") as pool:
+            return [result for chunk_results in pool.map(_run, chunks) for result in chunk_results]
+
+    def _safe_evaluate(self, params: dict, deadline: Deadline = None) -> dict:
+        try:
+            return self.ai.evaluate_writing_hybrid(**params, deadline=deadline)
+        except Exception as e:
+            print(f"❌ AI evaluation error, using rule-based score: {e}")
+            return self.ai.analyze_writing_rule_based(params["text"], params.get("keywords"))
+
     def _update_level_record(self, student_id: int, scores: dict, detected_level: str):
         record = self.repo.get_level_record(student_id)
         if record:
@@ -0,0 +1,129 @@
+import os
+import io
+import csv
+import json
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from src.database import SessionLocal
+from src.models.exam import ExamSession, Answer, Question
+from src.models.user import User
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_COLUMNS = [
+    "session_id", "student_id", "username", "start_time", "end_time", "status",
+    "overall_score", "detected_level", "answer_id", "question_id", "skill_category",
+    "question_type", "difficulty", "selected_option_id", "content", "is_correct",
+]
+
+
+class ExportService:
+    """
+    Streams exam results (one row per answer, with its session and question)
+    as CSV or NDJSON. Rows are read through a server-side cursor and written
+    chunk by chunk, so memory does not grow with the export size.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def iter_rows(self, date_from: datetime = None, date_to: datetime = None, skill: str = None, status: str = "COMPLETED"):
+        filters = []
+        if status: filters.append(ExamSession.status == status)
+        if date_from: filters.append(ExamSession.end_time >= date_from)
+        if date_to: filters.append(ExamSession.end_time < date_to)
+        if skill: filters.append(Question.skill_category.ilike(skill))
+
+        query = self.db.query(
+            ExamSession.session_id,
+            ExamSession.student_id,
+            User.username,
+            ExamSession.start_time,
+            ExamSession.end_time,
+            ExamSession.status,
+            ExamSession.overall_score,
+            ExamSession.detected_level,
+            Answer.answer_id,
+            Answer.question_id,
+            Question.skill_category,
+            Question.type.label("question_type"),
+            Question.difficulty,
+            Answer.selected_option_id,
+            Answer.content,
+            Answer.is_correct
+        ).join(
+            Answer, Answer.session_id == ExamSession.session_id
+        ).join(
+            Question, Question.question_id == Answer.question_id
+        ).outerjoin(
+            User, User.user_id == ExamSession.student_id
+        ).filter(*filters).order_by(ExamSession.session_id, Answer.answer_id)
+
+        for row in query.yield_per(EXPORT_BATCH_SIZE):
+            yield row._asdict()
+
+    @staticmethod
+    def iter_csv(rows):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+        for i, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if i % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    @staticmethod
+    def iter_ndjson(rows):
+        chunk = []
+        for row in rows:
+            chunk.append(json.dumps(row, default=str, ensure_ascii=False))
+            if len(chunk) >= EXPORT_BATCH_SIZE:
+                yield "\n".join(chunk) + "\n"
+                chunk = []
+        if chunk:
+            yield "\n".join(chunk) + "\n"
+
+    def stream(self, fmt: str = "csv", **filters):
+        rows = self.iter_rows(**filters)
+        return self.iter_ndjson(rows) if fmt == "ndjson" else self.iter_csv(rows)
+
+
+def stream_export(fmt: str = "csv", **filters):
+    """
+    Export generator with its own DB session (a StreamingResponse outlives
+    the request-scoped session).
+    """
+    db = SessionLocal()
+    try:
+        yield from ExportService(db).stream(fmt, **filters)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    # CLI: python -m src.services.export_service --format ndjson --from 2026-01-01 --skill READING -o results.ndjson
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export exam results as CSV or NDJSON.")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--from", dest="date_from", type=datetime.fromisoformat)
+    parser.add_argument("--to", dest="date_to", type=datetime.fromisoformat)
+    parser.add_argument("--skill")
+    parser.add_argument("--status", default="COMPLETED")
+    parser.add_argument("-o", "--output", help="File path (default: stdout)")
+    args = parser.parse_args()
+
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        for chunk in stream_export(args.format, date_from=args.date_from, date_to=args.date_to, skill=args.skill, status=args.status):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
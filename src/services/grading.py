@@ -0,0 +1,80 @@
+from dataclasses import dataclass
+
+from src.repositories.answer_keys import normalize_answer
+
+
+@dataclass
+class GradingItem:
+    """One answer going through grading (can come from any session)."""
+    answer: object
+    question: object
+    text: str = ""
+    score: float = 0.0
+    is_correct: bool = False
+    feedback: str = None
+
+
+# Question.type -> grader(items, keys). A grader scores a whole group of items at once.
+GRADERS = {}
+
+
+def register_grader(question_type: str):
+    def decorator(func):
+        GRADERS[question_type] = func
+        return func
+    return decorator
+
+
+@register_grader("MULTIPLE_CHOICE")
+def grade_multiple_choice(items: list, keys: dict):
+    for item in items:
+        key = keys.get(item.question.question_id)
+        correct_id = key.correct_option_id if key else None
+        item.is_correct = correct_id is not None and item.answer.selected_option_id == correct_id
+        item.score = 100.0 if item.is_correct else 0.0
+
+
+def grade_exact_match(items: list, keys: dict):
+    """Fill-in / short answers with a known answer key (Reading/Listening blanks)."""
+    for item in items:
+        key = keys.get(item.question.question_id)
+        selected = item.answer.selected_option_id
+        text = normalize_answer(item.text)
+        item.is_correct = bool(key and (
+            (selected is not None and selected == key.correct_option_id)
+            or (text and text in key.variants)
+        ))
+        item.score = 100.0 if item.is_correct else 0.0
+
+
+def resolve_grader(question, key):
+    """Objective grader for a question, or None if it needs the AI stage."""
+    grader = GRADERS.get(question.type)
+    if grader is not None:
+        return grader
+    # A correct option marks the question as objective, even when its content is empty
+    if key is not None and key.correct_option_id is not None:
+        return grade_exact_match
+    return None
+
+
+def grade_objective(items: list, keys: dict) -> list:
+    """
+    Scores every objective item in one pass (grouped per grader) and returns
+    the open-ended items that still need AI evaluation.
+    """
+    groups = {}
+    open_ended = []
+
+    for item in items:
+        grader = resolve_grader(item.question, keys.get(item.question.question_id))
+        if grader is not None:
+            groups.setdefault(grader, []).append(item)
+        elif item.text:
+            open_ended.append(item)
+        # Empty open-ended answer: stays at 0 / incorrect
+
+    for grader, group in groups.items():
+        grader(group, keys)
+
+    return open_ended
@@ -0,0 +1,79 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+# bcrypt releases the GIL, so a small thread pool hashes in parallel without
+# taking threads from the request threadpool
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hash/verify jobs allowed to wait; beyond this logins get 503 instead of piling up
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", "256"))
+
+# Single CryptContext for the whole process
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hash/verify on a dedicated, bounded executor so a login
+    spike at exam start cannot starve the exam routes.
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS, max_pending: int = HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hasher")
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        self.completed = 0
+        self.rejected = 0
+
+    def _submit(self, func, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(status_code=503, detail="Too many login attempts right now. Please try again in a moment.", headers={"Retry-After": "2"})
+            self._pending += 1
+
+        future = self._executor.submit(func, *args)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, _):
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    # Sync callers (blocks the calling thread, not the pool)
+    def hash(self, password: str) -> str:
+        return self._submit(pwd_context.hash, password).result()
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return self._submit(pwd_context.verify, password, hashed).result()
+
+    # Async callers (no thread is held while waiting)
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(pwd_context.hash, password))
+
+    async def verify_async(self, password: str, hashed: str) -> bool:
+        return await asyncio.wrap_future(self._submit(pwd_context.verify, password, hashed))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+# Single hasher per worker process
+password_hasher = PasswordHasher()
@@ -0,0 +1,166 @@
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from src.database import SessionLocal
+from src.models.exam import ExamSession, Answer, Question
+from src.models.report import FeedbackReport
+
+# Eski sınavlar için AI analizi yoksa gösterilen metin
+NO_FEEDBACK_TEXT = "This exam is old, so AI analysis is not available. You can see the analysis by taking a new exam."
+
+
+def level_for_score(score: float) -> str:
+    """CEFR level of an overall score (finalize and admin override use the same cut-offs)."""
+    if score >= 85: return "C1"
+    if score >= 70: return "B2"
+    if score >= 50: return "B1"
+    if score >= 30: return "A2"
+    return "A1"
+
+
+def level_feedback_line(score: float) -> str:
+    """First line of a session's feedback text."""
+    if score >= 85: return "🏆 Excellent! Your level is in the C1-C2 range."
+    if score >= 70: return "✅ Very good. You're at B2 level."
+    if score >= 50: return "📈 Average. You're at B1 level."
+    return "⚠️ Needs improvement. You are at A1-A2 level."
+
+
+def render_report(session: ExamSession, answers: list, feedback: str = None, answer_keys: dict = None) -> dict:
+    """
+    Detail payload of a finished session (analysis.html format).
+    Option texts come from answer_keys (question_id -> AnswerKey) when given,
+    otherwise answers must have question + options loaded.
+    """
+    questions_data = []
+    correct_count = 0
+    wrong_count = 0
+
+    for ans in answers:
+        question = ans.question
+        user_answer_text = "No answer"
+
+        key = answer_keys.get(question.question_id) if answer_keys is not None else None
+        if key is not None:
+            options = key.options
+            correct_content = key.display
+        else:
+            options = {opt.option_id: opt.content for opt in question.options}
+            correct_opt = next((opt for opt in question.options if opt.is_correct), None)
+            correct_content = correct_opt.content if correct_opt else None
+
+        if ans.selected_option_id:
+            selected_content = options.get(ans.selected_option_id)
+            if selected_content: user_answer_text = selected_content
+        else:
+            user_answer_text = ans.content or "No answer"
+
+        # Doğru cevabı belirle
+        correct_answer_text = correct_content if correct_content else "AI Evaluation"
+
+        if ans.is_correct: correct_count += 1
+        else: wrong_count += 1
+
+        questions_data.append({
+            "question_text": question.text,
+            "user_answer": user_answer_text,
+            "correct_answer": correct_answer_text,
+            "is_correct": ans.is_correct if ans.is_correct is not None else False
+        })
+
+    date = session.end_time if session.end_time else session.last_activity
+    return {
+        "date": date.isoformat() if date else None,
+        "score": session.overall_score,
+        "level": session.detected_level,
+        "correct_count": correct_count,
+        "wrong_count": wrong_count,
+        "ai_feedback": feedback or session.ai_feedback or NO_FEEDBACK_TEXT,
+        "questions": questions_data
+    }
+
+
+class ReportService:
+    """
+    Keeps one FeedbackReport per finished session holding the fully rendered
+    detail, so the analysis page is a single-row read. Callers commit.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_report(self, session_id: int):
+        return self.db.query(FeedbackReport).filter(FeedbackReport.session_id == session_id).first()
+
+    def save_report(self, session: ExamSession, answers: list, breakdown: dict = None, feedback: str = None,
+                    answer_keys: dict = None) -> FeedbackReport:
+        """Creates or refreshes the session's report (breakdown is kept when not given)."""
+        report = self.get_report(session.session_id)
+        if report is None:
+            report = FeedbackReport(session_id=session.session_id)
+            self.db.add(report)
+        return self._fill(report, session, answers, breakdown, feedback, answer_keys)
+
+    @staticmethod
+    def _fill(report: FeedbackReport, session: ExamSession, answers: list, breakdown: dict = None, feedback: str = None,
+              answer_keys: dict = None):
+        details = render_report(session, answers, feedback, answer_keys)
+        report.details = details
+        report.recommendations = details["ai_feedback"]
+        report.overall_score = session.overall_score
+        if breakdown is not None:
+            report.score_breakdown = breakdown
+        return report
+
+    def _load_answers(self, session_id: int) -> list:
+        return self.db.query(Answer).options(
+            joinedload(Answer.question).joinedload(Question.options)
+        ).filter(Answer.session_id == session_id).order_by(Answer.answer_id).all()
+
+    def get_detail(self, session_id: int):
+        """Stored detail of a finished session, or None if no report was written yet."""
+        details = self.db.query(FeedbackReport.details).filter(FeedbackReport.session_id == session_id).scalar()
+        return details or None
+
+    def render_detail(self, session: ExamSession) -> dict:
+        """Read-only detail of a finished session without a report (until the backfill writes one)."""
+        return render_report(session, self._load_answers(session.session_id))
+
+    def save_session_report(self, session: ExamSession) -> FeedbackReport:
+        """Report of a session that ends without grading (expired): answers are loaded here."""
+        return self.save_report(session, self._load_answers(session.session_id))
+
+    def backfill(self, batch_size: int = 200) -> int:
+        """Writes reports for every finished session that has none yet."""
+        written = 0
+        last_id = 0
+        while True:
+            sessions = self.db.query(ExamSession).options(
+                selectinload(ExamSession.answers).joinedload(Answer.question).joinedload(Question.options)
+            ).outerjoin(
+                FeedbackReport, FeedbackReport.session_id == ExamSession.session_id
+            ).filter(
+                ExamSession.status.in_(["COMPLETED", "EXPIRED"]),
+                FeedbackReport.report_id.is_(None),
+                ExamSession.session_id > last_id
+            ).order_by(ExamSession.session_id).limit(batch_size).all()
+            if not sessions:
+                return written
+
+            for session in sessions:
+                report = FeedbackReport(session_id=session.session_id)
+                self.db.add(report)
+                self._fill(report, session, sorted(session.answers, key=lambda a: a.answer_id))
+                last_id = session.session_id
+                written += 1
+            self.db.commit()
+            self.db.expunge_all()
+
+
+if __name__ == "__main__":
+    # Backfill: python -m src.services.report_service
+    db = SessionLocal()
+    try:
+        count = ReportService(db).backfill()
+        print(f"✅ Feedback reports written for {count} session(s).")
+    finally:
+        db.close()
@@ -0,0 +1,186 @@
+import os
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from src.services.audio_preprocess import audio_preprocessor, SAMPLE_RATE
+from src.utils.resilience import Deadline
+
+# Worker processes for chunked transcription (0 = off, every recording is one transcribe call)
+STT_PARALLEL_WORKERS = int(os.getenv("STT_PARALLEL_WORKERS", "0"))
+# Recordings shorter than this (speech seconds, after trimming) keep the single-call path
+STT_CHUNK_MIN_SECONDS = float(os.getenv("STT_CHUNK_MIN_SECONDS", "60"))
+# Chunk length (Whisper decodes 30 s windows) and how far back a cut may move to find silence
+STT_CHUNK_SECONDS = float(os.getenv("STT_CHUNK_SECONDS", "30"))
+STT_CHUNK_SEARCH_SECONDS = float(os.getenv("STT_CHUNK_SEARCH_SECONDS", "5"))
+# Budget for all chunks of one recording (model loading excluded); past it the single call is used
+STT_CHUNK_TIMEOUT_SECONDS = float(os.getenv("STT_CHUNK_TIMEOUT_SECONDS", "120"))
+# How long a new pool may take to load Whisper in every worker before it is given up
+STT_POOL_WARMUP_SECONDS = float(os.getenv("STT_POOL_WARMUP_SECONDS", "300"))
+
+# --- Worker process side ---
+# Every worker loads its own Whisper model once (models cannot be shared across processes)
+_worker_model = None
+
+
+def _init_worker(model_name: str, torch_threads: int, ready):
+    global _worker_model
+    import torch
+    import whisper
+    # Workers share the cores: without this each one starts a thread per core
+    torch.set_num_threads(torch_threads)
+    _worker_model = whisper.load_model(model_name)
+    ready.put(os.getpid())
+
+
+def _noop():
+    return None
+
+
+def _transcribe_chunk(samples) -> list:
+    """[(start, end, text), ...] of one chunk, timestamps relative to the chunk."""
+    result = _worker_model.transcribe(samples, fp16=False)
+    return [(seg["start"], seg["end"], seg["text"].strip()) for seg in result["segments"]]
+
+
+class ParallelTranscriber:
+    """
+    Splits long, already trimmed recordings at silence, transcribes the chunks
+    on a process pool and stitches the text back in order with timestamps.
+    """
+
+    def __init__(self, workers: int = STT_PARALLEL_WORKERS, min_seconds: float = STT_CHUNK_MIN_SECONDS):
+        self.workers = workers
+        self.min_seconds = min_seconds
+        self._executor = None
+        self._lock = threading.Lock()
+
+        self.recordings = 0
+        self.chunks = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.recycles = 0
+
+    @property
+    def mode(self) -> str:
+        """Part of the transcript cache key: chunked text can differ from a single pass."""
+        return f"chunked:{STT_CHUNK_SECONDS},{STT_CHUNK_SEARCH_SECONDS}"
+
+    def accepts(self, audio) -> bool:
+        """Chunking only pays off for long recordings; short ones stay on one call."""
+        return self.workers > 0 and audio is not None and audio.speech_seconds >= self.min_seconds
+
+    def _get_executor(self, model_name: str):
+        """The pool, started and warmed (Whisper loaded in every worker) on first use."""
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that already holds torch/Whisper threads is unsafe
+                context = multiprocessing.get_context("spawn")
+                ready = context.Queue()
+                executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(model_name, max(1, (os.cpu_count() or 1) // self.workers), ready)
+                )
+                try:
+                    # One task per worker starts them all; each reports once its model is loaded
+                    starters = [executor.submit(_noop) for _ in range(self.workers)]
+                    deadline = Deadline(STT_POOL_WARMUP_SECONDS)
+                    loaded = 0
+                    while loaded < self.workers:
+                        failed = next((f for f in starters if f.done() and f.exception()), None)
+                        if failed is not None:
+                            raise failed.exception()  # e.g. Whisper could not be loaded
+                        if deadline.expired():
+                            raise TimeoutError(f"pool warm-up took over {STT_POOL_WARMUP_SECONDS:g}s")
+                        try:
+                            ready.get(timeout=min(0.5, deadline.remaining()))
+                            loaded += 1
+                        except queue.Empty:
+                            pass
+                except Exception:
+                    self._terminate(executor)
+                    raise
+                self._executor = executor
+            return self._executor
+
+    def warm(self, model_name: str):
+        """Starts the pool now (AI_WORKER_MODE=preload) instead of on the first long recording."""
+        if self.workers > 0:
+            self._get_executor(model_name)
+
+    @staticmethod
+    def _terminate(executor):
+        # Running chunks cannot be cancelled: their processes are stopped so they free the CPU
+        # (the pool has no public API for this before Python 3.14)
+        for process in list(getattr(executor, "_processes", {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _recycle(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None  # Rebuilt (and warmed) on the next long recording
+                self.recycles += 1
+        self._terminate(executor)
+
+    def transcribe(self, samples, model_name: str, timeout: float = STT_CHUNK_TIMEOUT_SECONDS):
+        """
+        {"text", "segments": [{"start", "end", "text"}]} with timestamps on the
+        trimmed timeline, or None if the pool failed or the chunks were not done
+        within timeout seconds (caller uses the single call).
+        """
+        chunks = audio_preprocessor.split(samples, STT_CHUNK_SECONDS, STT_CHUNK_SEARCH_SECONDS)
+        executor = None
+        try:
+            executor = self._get_executor(model_name)
+            # The timer starts once the models are loaded: only transcription counts against it
+            futures = [executor.submit(_transcribe_chunk, chunk) for _, chunk in chunks]
+            _, pending = wait(futures, timeout=timeout)
+            if pending:
+                raise TimeoutError(f"{len(pending)} of {len(futures)} chunk(s) unfinished after {timeout:g}s")
+            results = [f.result() for f in futures]
+        except Exception as e:
+            print(f"❌ Parallel transcription failed, falling back to a single call: {e}")
+            with self._lock:
+                self.failures += 1
+                self.timeouts += isinstance(e, TimeoutError)
+            if executor is not None and isinstance(e, (TimeoutError, BrokenProcessPool)):
+                # Stuck workers would keep transcribing next to the fallback call
+                self._recycle(executor)
+            return None
+
+        segments = [
+            {"start": round(offset + start, 2), "end": round(offset + end, 2), "text": text}
+            for (offset, _), chunk_segments in zip(chunks, results)
+            for start, end, text in chunk_segments
+            if text
+        ]
+        with self._lock:
+            self.recordings += 1
+            self.chunks += len(chunks)
+        print(f"🧩 {len(samples) / SAMPLE_RATE:.1f}s transcribed in {len(chunks)} parallel chunk(s).")
+        return {"text": " ".join(seg["text"] for seg in segments), "segments": segments}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "min_seconds": self.min_seconds,
+            "chunk_seconds": STT_CHUNK_SECONDS,
+            "recordings": self.recordings,
+            "chunks": self.chunks,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "recycles": self.recycles,
+        }
+
+
+# Single pool per worker process (created on the first long recording)
+parallel_transcriber = ParallelTranscriber()
@@ -0,0 +1,136 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Shared by all workers on the host, next to the evaluation cache
+TRANSCRIPT_CACHE_PATH = os.getenv("TRANSCRIPT_CACHE_PATH", "data/transcripts.sqlite3")
+
+# Uploads are stored as <sha256>.<ext> (audio_storage), older ones as rec_<timestamp>.webm
+_DIGEST_NAME = re.compile(r"^[0-9a-f]{64}$")
+
+
+def audio_digest(audio_path: str, chunk_bytes: int = 1024 * 1024) -> str:
+    """sha256 of a recording; free for content-addressed uploads, streamed otherwise."""
+    stem = os.path.splitext(os.path.basename(audio_path))[0]
+    if _DIGEST_NAME.match(stem):
+        return stem
+    hasher = hashlib.sha256()
+    with open(audio_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_bytes), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class TranscriptCache:
+    """
+    Whisper transcripts keyed by (audio content hash, model version), so a
+    retried submit or a re-grade never transcribes the same recording twice
+    with the same model. A transcript lives as long as its recording: rows
+    whose file was deleted are removed by prune(), run from the CLI below
+    (or a cron job), never on the request path.
+    """
+
+    def __init__(self, path: str = TRANSCRIPT_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.pruned = 0
+
+    def _db(self):
+        if self._conn is None and self.path:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS transcripts ("
+                    " audio_hash TEXT NOT NULL, model_version TEXT NOT NULL,"
+                    " audio_path TEXT NOT NULL, text TEXT NOT NULL, created_at REAL NOT NULL,"
+                    " PRIMARY KEY (audio_hash, model_version))"
+                )
+                conn.commit()
+                self._conn = conn
+            except sqlite3.Error as e:
+                print(f"⚠️ Transcript cache disabled (SQLite error): {e}")
+                self.path = None
+        return self._conn
+
+    def get(self, audio_hash: str, model_version: str):
+        with self._lock:
+            conn = self._db()
+            row = None
+            if conn is not None:
+                try:
+                    row = conn.execute(
+                        "SELECT text FROM transcripts WHERE audio_hash = ? AND model_version = ?",
+                        (audio_hash, model_version)
+                    ).fetchone()
+                except sqlite3.Error:
+                    row = None
+            if row:
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def set(self, audio_hash: str, model_version: str, audio_path: str, text: str):
+        with self._lock:
+            self.stores += 1
+            conn = self._db()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO transcripts (audio_hash, model_version, audio_path, text, created_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    # Absolute, so prune() finds the file whatever directory it runs from
+                    (audio_hash, model_version, os.path.abspath(audio_path), text, time.time())
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Transcript cache write error: {e}")
+
+    def prune(self) -> int:
+        """Deletes transcripts whose recording no longer exists. Returns the number of recordings."""
+        with self._lock:
+            conn = self._db()
+            if conn is None:
+                return 0
+            paths = [row[0] for row in conn.execute("SELECT DISTINCT audio_path FROM transcripts")]
+
+        # Retention follows the recordings: no file, no transcript (files checked outside the lock)
+        gone = [(p,) for p in paths if not os.path.exists(p)]
+        if gone:
+            with self._lock:
+                conn.executemany("DELETE FROM transcripts WHERE audio_path = ?", gone)
+                conn.commit()
+                self.pruned += len(gone)
+        return len(gone)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "pruned_recordings": self.pruned,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+# Single cache per worker process
+transcript_cache = TranscriptCache()
+
+
+if __name__ == "__main__":
+    # Cleanup after deleting recordings (run from the app root, or schedule it with cron):
+    # python -m src.services.transcript_cache
+    transcript_cache.prune()
+    print(f"✅ Transcripts of {transcript_cache.pruned} deleted recording(s) removed.")
@@ -0,0 +1,167 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+from src.services.ai_service import get_ai_module, STT_ERROR_MSG
+from src.services.audio_preprocess import audio_preprocessor
+
+# speech_to_text serializes Whisper on registry.stt_lock (long recordings fan out in stt_pool),
+# so more threads would only wait on the lock
+STT_WORKERS = 1
+# Maximum recordings queued at upload; beyond this the recording is queued when the exam is submitted
+STT_MAX_PENDING = int(os.getenv("STT_MAX_PENDING", "50"))
+# How long finalize waits for a queued/running job before giving up on it
+STT_WAIT_SECONDS = float(os.getenv("STT_WAIT_SECONDS", "120"))
+# Finished jobs are kept this long so retried submits can reuse them
+STT_JOB_TTL_SECONDS = int(os.getenv("STT_JOB_TTL_SECONDS", "7200"))
+
+
+def resolve_audio_path(audio_url: str) -> str:
+    """Converts a public '/static/...' URL into the path on disk."""
+    return f"src{audio_url}" if audio_url.startswith("/static") else audio_url
+
+
+class TranscriptionQueue:
+    """
+    Bounded background pool that transcribes recordings right after upload,
+    so that finalize_exam only has to pick up the stored transcript.
+    """
+
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+    def __init__(self, max_pending: int = STT_MAX_PENDING):
+        self.max_workers = STT_WORKERS
+        self.max_pending = max_pending
+        self._executor = None
+        self._lock = threading.Lock()
+        self._jobs = {}  # audio_url -> job dict
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stt")
+        return self._executor
+
+    def _pending_count(self):
+        return sum(1 for j in self._jobs.values() if j["state"] in (self.QUEUED, self.RUNNING))
+
+    def _evict_expired(self):
+        now = time.time()
+        expired = [
+            url for url, j in self._jobs.items()
+            if j["state"] in (self.DONE, self.FAILED) and now - j["finished_ts"] > STT_JOB_TTL_SECONDS
+        ]
+        for url in expired:
+            del self._jobs[url]
+
+    def submit(self, audio_url: str) -> bool:
+        """Queues a recording. Returns False if the queue is full."""
+        with self._lock:
+            self._evict_expired()
+            existing = self._jobs.get(audio_url)
+            if existing and existing["state"] != self.FAILED:
+                return True
+            if self._pending_count() >= self.max_pending:
+                print(f"⚠️ Transcription queue full, {audio_url} will be transcribed at submit.")
+                return False
+            self._enqueue(audio_url)
+            return True
+
+    def _enqueue(self, audio_url: str) -> dict:
+        """New job for the recording; caller holds self._lock."""
+        job = {
+            "state": self.QUEUED,
+            "text": None,
+            "error": None,
+            "queued_at": datetime.now().isoformat(timespec="seconds"),
+            "finished_ts": None,
+            "future": None,
+        }
+        self._jobs[audio_url] = job
+        job["future"] = self._get_executor().submit(self._run, audio_url, job)
+        return job
+
+    def _run(self, audio_url: str, job: dict):
+        job["state"] = self.RUNNING
+        try:
+            text = get_ai_module().speech_to_text(resolve_audio_path(audio_url))
+            if text == STT_ERROR_MSG:
+                # Not a transcript: finalize re-transcribes instead of grading this message
+                job["error"] = "No transcript (unintelligible audio or transcription error)."
+                job["state"] = self.FAILED
+            else:
+                job["text"] = text
+                job["state"] = self.DONE
+        except Exception as e:
+            job["error"] = str(e)
+            job["state"] = self.FAILED
+            print(f"❌ Background transcription error ({audio_url}): {e}")
+        finally:
+            job["finished_ts"] = time.time()
+        return job["text"]
+
+    def get_transcripts(self, audio_urls: list, timeout: float = STT_WAIT_SECONDS) -> dict:
+        """
+        {audio_url: transcript} for several recordings. Recordings without a usable
+        job (not queued at upload, queue was full, failed) are queued now, past
+        max_pending since the submit is waiting for them, and all jobs are waited
+        for together against one deadline. Whisper only ever runs in the queue:
+        a recording not transcribed in time gets STT_ERROR_MSG.
+        """
+        with self._lock:
+            self._evict_expired()
+            jobs = {}
+            for url in audio_urls:
+                job = self._jobs.get(url)
+                jobs[url] = job if job and job["state"] != self.FAILED else self._enqueue(url)
+
+        if jobs:
+            _, not_done = wait([job["future"] for job in jobs.values()], timeout=timeout)
+            if not_done:
+                print(f"⚠️ {len(not_done)} transcription(s) still running after {timeout}s, graded as unintelligible")
+
+        return {
+            url: job["text"] if job["future"].done() and job["state"] == self.DONE else STT_ERROR_MSG
+            for url, job in jobs.items()
+        }
+
+    def get_transcript(self, audio_url: str, timeout: float = STT_WAIT_SECONDS):
+        return self.get_transcripts([audio_url], timeout)[audio_url]
+
+    def status(self, audio_url: str = None) -> dict:
+        with self._lock:
+            counts = {}
+            for j in self._jobs.values():
+                counts[j["state"]] = counts.get(j["state"], 0) + 1
+
+            result = {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "queue_depth": self._pending_count(),
+                "jobs": counts,
+            }
+            if audio_url is not None:
+                job = self._jobs.get(audio_url)
+                result["recording"] = {
+                    "filename": audio_url,
+                    "state": job["state"] if job else "UNKNOWN",
+                    "queued_at": job["queued_at"] if job else None,
+                    "error": job["error"] if job else None,
+                }
+        # Seconds of silence trimmed before Whisper (overall and for this recording)
+        result["preprocessing"] = audio_preprocessor.stats(
+            resolve_audio_path(audio_url) if audio_url is not None else None
+        )
+        return result
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Single queue per worker process
+transcription_queue = TranscriptionQueue()
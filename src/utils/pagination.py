@@ -0,0 +1,110 @@
+import os
+import time
+import base64
+import json
+import threading
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+from src.utils.error_handler import raise_bad_request
+
+# Page size limits for the list endpoints
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# List totals are cached (approximate) instead of counting the table on every page
+LIST_COUNT_TTL_SECONDS = int(os.getenv("LIST_COUNT_TTL_SECONDS", "60"))
+
+
+def encode_cursor(*values) -> str:
+    """Opaque keyset cursor from the sort key of the last row of a page."""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """
+    Inverse of encode_cursor. types gives the expected type of each value
+    (datetime values are parsed back from ISO format). Raises 400 on bad input.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if len(values) != len(types):
+            raise ValueError("cursor length")
+        return tuple(
+            datetime.fromisoformat(v) if t is datetime else t(v)
+            for v, t in zip(values, types)
+        )
+    except (ValueError, TypeError):
+        raise_bad_request("Invalid cursor")
+
+
+def apply_keyset(query, sort_col, id_col, limit: int, cursor: str = None, descending: bool = True):
+    """
+    Adds the keyset condition, ordering and limit (+1 row) for (sort_col, id_col)
+    to a column-projected Query or select(). sort_col must be non-null: wrap a
+    nullable column in a labelled coalesce() that is also selected.
+    """
+    if cursor:
+        if sort_col is id_col:
+            (last_id,) = decode_cursor(cursor, int)
+            query = query.filter(id_col < last_id if descending else id_col > last_id)
+        else:
+            last_value, last_id = decode_cursor(cursor, sort_col.type.python_type, int)
+            before = sort_col < last_value if descending else sort_col > last_value
+            tie = id_col < last_id if descending else id_col > last_id
+            query = query.filter(or_(before, and_(sort_col == last_value, tie)))
+
+    if sort_col is id_col:
+        order = [id_col.desc() if descending else id_col.asc()]
+    else:
+        order = [sort_col.desc(), id_col.desc()] if descending else [sort_col.asc(), id_col.asc()]
+    return query.order_by(*order).limit(limit + 1)
+
+
+def split_page(rows: list, sort_col, id_col, limit: int):
+    """(rows, next_cursor) from the limit + 1 rows fetched by apply_keyset."""
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        values = [getattr(last, id_col.key)] if sort_col is id_col else [getattr(last, sort_col.key), getattr(last, id_col.key)]
+        next_cursor = encode_cursor(*values)
+    return page, next_cursor
+
+
+def keyset_page(query, sort_col, id_col, limit: int, cursor: str = None, descending: bool = True):
+    """Runs a keyset-paginated Query. Returns (rows, next_cursor)."""
+    rows = apply_keyset(query, sort_col, id_col, limit, cursor, descending).all()
+    return split_page(rows, sort_col, id_col, limit)
+
+
+class CountCache:
+    """Short-lived cache of list totals keyed by (listing, filters)."""
+
+    def __init__(self, ttl_seconds: int = LIST_COUNT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._counts = {}  # key -> (counted_at, total)
+
+    def get(self, key, counter) -> int:
+        entry = self._counts.get(key)
+        if entry and time.monotonic() - entry[0] < self.ttl_seconds:
+            return entry[1]
+        total = counter()
+        with self._lock:
+            self._counts[key] = (time.monotonic(), total)
+        return total
+
+    def invalidate(self, prefix: str = None):
+        with self._lock:
+            if prefix is None:
+                self._counts.clear()
+            else:
+                for key in [k for k in self._counts if k[0] == prefix]:
+                    del self._counts[key]
+
+
+# Single cache per worker process
+count_cache = CountCache()
@@ -0,0 +1,108 @@
+import time
+import threading
+from datetime import datetime
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing external service for a cooldown period.
+
+    CLOSED    -> calls go through, consecutive failures are counted
+    OPEN      -> calls are rejected until the cooldown has passed
+    HALF_OPEN -> a single probe call is allowed; success closes, failure re-opens
+    """
+
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+    def __init__(self, name: str, failure_threshold: int = 3, cooldown_seconds: float = 60.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+        self.trip_count = 0
+        self.rejected_calls = 0
+        self.last_error = None
+        self.last_trip_at = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected_calls += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """The call failed for a reason unrelated to the service: neither success nor failure."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self, error: Exception = None):
+        with self._lock:
+            self.last_error = str(error) if error else None
+            self._consecutive_failures += 1
+            state = self._current_state()
+            if state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if state != self.OPEN:
+                    self.trip_count += 1
+                    self.last_trip_at = datetime.now().isoformat(timespec="seconds")
+                    print(f"🔌 Circuit '{self.name}' OPEN for {self.cooldown_seconds}s (error: {self.last_error})")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self._current_state(),
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "cooldown_seconds": self.cooldown_seconds,
+                "trip_count": self.trip_count,
+                "rejected_calls": self.rejected_calls,
+                "last_trip_at": self.last_trip_at,
+                "last_error": self.last_error,
+            }
+
+
+class Deadline:
+    """Latency budget shared by all the work done for one request."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self._expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self._expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
@@ -0,0 +1,69 @@
+import re
+from functools import lru_cache
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_END = object()  # trie key marking "a term ends here"
+
+
+def tokenize(text: str) -> list:
+    """Lower-case word tokens; the matcher only ever compares whole words."""
+    return _WORD_RE.findall((text or "").lower())
+
+
+class TermMatcher:
+    """
+    Word-boundary aware multi-term matcher.
+
+    Terms (single words or phrases) are compiled once into a word-level trie,
+    so a text is scanned in a single pass no matter how many terms there are,
+    and "since" never matches inside "sincere". Each term can carry a label
+    (e.g. its CEFR level) for per-label hit counts.
+    """
+
+    def __init__(self, terms):
+        # terms: iterable of strings, or dict term -> label
+        labelled = terms.items() if isinstance(terms, dict) else ((t, None) for t in terms)
+
+        self._root = {}
+        self.size = 0
+        for term, label in labelled:
+            words = tokenize(term)
+            if not words:
+                continue
+            node = self._root
+            for word in words:
+                node = node.setdefault(word, {})
+            if _END not in node:
+                self.size += 1
+            node[_END] = (" ".join(words), label)
+
+    def scan(self, tokens: list) -> list:
+        """All (term, label) occurrences in a token list, including overlapping phrases."""
+        hits = []
+        root = self._root
+        for start in range(len(tokens)):
+            node = root.get(tokens[start])
+            pos = start + 1
+            while node is not None:
+                if _END in node:
+                    hits.append(node[_END])
+                if pos >= len(tokens):
+                    break
+                node = node.get(tokens[pos])
+                pos += 1
+        return hits
+
+    def matched_terms(self, tokens: list) -> set:
+        return {term for term, _ in self.scan(tokens)}
+
+    def count_by_label(self, tokens: list) -> dict:
+        counts = {}
+        for _, label in self.scan(tokens):
+            counts[label] = counts.get(label, 0) + 1
+        return counts
+
+
+@lru_cache(maxsize=1024)
+def get_keyword_matcher(keywords: tuple) -> TermMatcher:
+    """Matcher for a question's keyword list, compiled once and reused."""
+    return TermMatcher(keywords)
@@ -0,0 +1,52 @@
+import io
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from src.services.audio_storage import AudioStorage
+from src.services.audio_preprocess import audio_preprocessor, SAMPLE_RATE
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return AudioStorage(root=str(tmp_path), chunk_bytes=4)
+
+
+def test_chunk_at_the_wrong_offset_is_409(storage):
+    upload_id = storage.start_upload()
+    assert storage.append_chunk(upload_id, 0, io.BytesIO(b"first-")) == 6
+
+    # A retried chunk (old offset) and a chunk from the future are both refused
+    for offset in (0, 12):
+        with pytest.raises(HTTPException) as exc:
+            storage.append_chunk(upload_id, offset, io.BytesIO(b"again"))
+        assert exc.value.status_code == 409
+        assert exc.value.detail["offset"] == 6
+
+    # Nothing was written by the refused chunks: the client resumes at the reported offset
+    assert storage.upload_offset(upload_id) == 6
+    assert storage.append_chunk(upload_id, 6, io.BytesIO(b"second")) == 12
+
+
+def _speech(seconds: float, pause_every: float = 4.0):
+    """Tone with a short quiet gap every pause_every seconds (cut candidates)."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    samples = (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+    samples[(t % pause_every) > pause_every - 0.3] *= 0.001
+    return samples
+
+
+@pytest.mark.parametrize("seconds", [5.0, 61.3, 95.0])
+def test_split_offsets_cover_the_input(seconds):
+    samples = _speech(seconds)
+    chunks = audio_preprocessor.split(samples, 30, 5)
+
+    assert sum(len(chunk) for _, chunk in chunks) == len(samples)
+    assert np.array_equal(np.concatenate([chunk for _, chunk in chunks]), samples)
+
+    # Every offset is where the chunk starts in the input
+    position = 0
+    for offset, chunk in chunks:
+        assert offset == position / SAMPLE_RATE
+        position += len(chunk)
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+from src.repositories.answer_keys import AnswerKeyCache
+from src.services.grading import GradingItem, grade_objective
+
+
+def _option(option_id: int, content: str, is_correct: bool = False):
+    return SimpleNamespace(option_id=option_id, question_id=1, content=content, is_correct=is_correct)
+
+
+def _grade(options, text: str = "", selected_option_id: int = None):
+    """Grades one FILL answer against the key built from options. Returns (item, open_ended)."""
+    key = AnswerKeyCache.build(1, options)
+    item = GradingItem(
+        answer=SimpleNamespace(selected_option_id=selected_option_id),
+        question=SimpleNamespace(question_id=1, type="FILL"),
+        text=text
+    )
+    return item, grade_objective([item], {1: key})
+
+
+def test_content_is_matched_as_a_whole():
+    options = [_option(10, "Colour|Color", is_correct=True), _option(11, "Red")]
+
+    item, open_ended = _grade(options, text=" colour|color ")
+    assert open_ended == [] and item.is_correct and item.score == 100.0
+
+    # "|" is not variant syntax: half of the stored content is a wrong answer
+    item, open_ended = _grade(options, text="color")
+    assert open_ended == [] and not item.is_correct and item.score == 0.0
+
+
+def test_empty_correct_content_is_matched_by_option_id():
+    options = [_option(10, "", is_correct=True), _option(11, "Red")]
+
+    item, open_ended = _grade(options, selected_option_id=10)
+    assert open_ended == [] and item.is_correct
+
+    item, open_ended = _grade(options, selected_option_id=11)
+    assert open_ended == [] and not item.is_correct
+
+    # No text and no option: still objective, never sent to the AI stage or matched on ""
+    item, open_ended = _grade(options)
+    assert open_ended == [] and not item.is_correct
+
+
+def test_question_without_correct_option_goes_to_ai():
+    item, open_ended = _grade([_option(10, "Anything")], text="An essay")
+    assert open_ended == [item]
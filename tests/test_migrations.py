@@ -0,0 +1,78 @@
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("EVAL_CACHE_PATH", "")
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.database import Base
+from src.models.exam import Answer
+from src.models.report import FeedbackReport
+from src.repositories.exam_repo import ExamRepository
+from src.migrations import run_migrations, has_unique_key
+
+# answers as created before the unique key existed
+OLD_ANSWERS_TABLE = (
+    "CREATE TABLE answers (answer_id INTEGER PRIMARY KEY, session_id INTEGER, question_id INTEGER,"
+    " selected_option_id INTEGER, content TEXT, audio_path VARCHAR(255), is_correct BOOLEAN, listen_count INTEGER)"
+)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_fresh_schema_needs_no_migration(engine):
+    assert run_migrations(engine) == []
+
+
+def test_answers_key_is_added_after_deduping(engine):
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE answers"))
+        conn.execute(text(OLD_ANSWERS_TABLE))
+        conn.execute(text(
+            "INSERT INTO answers (answer_id, session_id, question_id, content) VALUES"
+            " (1, 1, 10, 'old'), (2, 1, 10, 'new'), (3, 1, 11, 'only'), (4, NULL, 10, 'orphan')"
+        ))
+        assert not has_unique_key(conn, "answers", ["session_id", "question_id"])
+
+    assert run_migrations(engine) == ["answers_unique_session_question"]
+    assert run_migrations(engine) == []
+
+    with engine.connect() as conn:
+        assert has_unique_key(conn, "answers", ["session_id", "question_id"])
+        rows = conn.execute(text("SELECT answer_id, content FROM answers ORDER BY answer_id")).all()
+    assert [tuple(r) for r in rows] == [(2, "new"), (3, "only"), (4, "orphan")]
+
+    # The upsert now updates the kept row instead of adding another one
+    db = sessionmaker(bind=engine)()
+    ExamRepository(db).bulk_upsert_answers(1, [{"question_id": 10, "content": "resubmitted"}])
+    assert [a.content for a in db.query(Answer).filter(Answer.session_id == 1, Answer.question_id == 10)] == ["resubmitted"]
+    db.close()
+
+
+def test_feedback_reports_get_details_and_one_row_per_session(engine):
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE feedback_reports"))
+        conn.execute(text(
+            "CREATE TABLE feedback_reports (report_id INTEGER PRIMARY KEY, session_id INTEGER,"
+            " recommendations TEXT, overall_score FLOAT, score_breakdown JSON, generated_at DATETIME)"
+        ))
+        conn.execute(text(
+            "INSERT INTO feedback_reports (report_id, session_id, overall_score) VALUES (1, 5, 40), (2, 5, 60), (3, 6, 70)"
+        ))
+
+    assert run_migrations(engine) == ["feedback_reports_details", "feedback_reports_unique_session"]
+    assert run_migrations(engine) == []
+
+    db = sessionmaker(bind=engine)()
+    reports = db.query(FeedbackReport).order_by(FeedbackReport.report_id).all()
+    assert [(r.report_id, r.session_id, r.details) for r in reports] == [(2, 5, None), (3, 6, None)]
+    db.close()
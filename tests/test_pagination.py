@@ -0,0 +1,121 @@
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("EVAL_CACHE_PATH", "")
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.database import Base
+from src.models.user import Student
+from src.models.exam import Question, ExamSession
+from src.repositories.exam_repo import ExamRepository
+from src.repositories.question_repo import QuestionRepository
+from src.utils.pagination import encode_cursor, decode_cursor
+
+T0 = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def sessions(db):
+    """Student with 8 sessions: unfinished ones (no end_time), a missing score and duplicate sort keys."""
+    student = Student(username="student", email="student@example.com", password_hash="x")
+    db.add(student)
+    db.flush()
+    for i in range(8):
+        unfinished = i % 3 == 0
+        db.add(ExamSession(
+            student_id=student.user_id,
+            status="IN_PROGRESS" if unfinished else "COMPLETED",
+            # Pairs share a start time, so the id decides within a pair
+            start_time=T0 + timedelta(hours=i // 2),
+            end_time=None if unfinished else T0 + timedelta(hours=i // 2, minutes=30),
+            overall_score=None if i == 2 else float(i % 4) * 10
+        ))
+    db.commit()
+    return student.user_id, db.query(ExamSession).all()
+
+
+def _all_pages(fetch, limit: int):
+    """Follows next_cursor until the last page. fetch(limit, cursor) -> (rows, next_cursor, ...)."""
+    seen, cursor = [], None
+    while True:
+        rows, cursor = fetch(limit, cursor)[:2]
+        assert len(rows) <= limit
+        seen += rows
+        if not cursor:
+            return seen
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(T0, 7)
+    assert decode_cursor(cursor, datetime, int) == (T0, 7)
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor(1, 2, 3), encode_cursor("yesterday", 1)])
+def test_bad_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, datetime, int)
+    assert exc.value.status_code == 400
+
+
+def test_bad_cursor_on_a_listing_is_400(db):
+    with pytest.raises(HTTPException) as exc:
+        ExamRepository(db).get_history_page(1, 2, "garbage")
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize("limit", [1, 3])
+def test_history_pages_cover_every_session_once(db, sessions, limit):
+    student_id, rows = sessions
+    seen = _all_pages(lambda l, c: ExamRepository(db).get_history_page(student_id, l, c), limit)
+    expected = sorted(rows, key=lambda s: (s.start_time, s.session_id), reverse=True)
+    assert [r.session_id for r in seen] == [s.session_id for s in expected]
+
+
+@pytest.mark.parametrize("descending", [True, False])
+@pytest.mark.parametrize("sort", ["end_time", "overall_score"])
+def test_session_listing_pages_follow_the_coalesced_sort(db, sessions, sort, descending):
+    _, rows = sessions
+    repo = ExamRepository(db)
+    seen = _all_pages(
+        lambda l, c: repo.list_sessions_page(l, c, sort=sort, descending=descending, status=None), 3
+    )
+
+    # Unfinished sessions sort by their start time, a missing score as 0
+    if sort == "overall_score":
+        sort_key = lambda s: (s.overall_score or 0.0, s.session_id)
+    else:
+        sort_key = lambda s: (s.end_time or s.start_time, s.session_id)
+    expected = sorted(rows, key=sort_key, reverse=descending)
+    assert [r.session_id for r in seen] == [s.session_id for s in expected]
+
+
+def test_question_listing_pages_in_both_directions(db):
+    db.add_all([
+        Question(text=f"Q{i}", type="FILL", difficulty="A1", skill_category="READING" if i % 2 else "WRITING")
+        for i in range(7)
+    ])
+    db.commit()
+    repo = QuestionRepository(db)
+    reading = sorted(q.question_id for q in db.query(Question).filter(Question.skill_category == "READING"))
+
+    asc = _all_pages(lambda l, c: repo.list_page(l, c, descending=False, skill="reading"), 2)
+    desc = _all_pages(lambda l, c: repo.list_page(l, c, descending=True, skill="reading"), 2)
+    assert [r.question_id for r in asc] == reading
+    assert [r.question_id for r in desc] == reading[::-1]
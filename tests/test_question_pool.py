@@ -0,0 +1,59 @@
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("EVAL_CACHE_PATH", "")
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.database import Base
+from src.models.user import Student
+from src.models.exam import Question, QuestionOption
+from src.repositories.exam_repo import ExamRepository
+from src.repositories.question_pool import QuestionPoolCache, get_question_version
+
+
+@pytest.fixture
+def Session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine, autoflush=False)
+    engine.dispose()
+
+
+def _pool_texts(db, cache):
+    repo = ExamRepository(db)
+    pool = cache.get_pool("reading", "A1", lambda: repo._load_question_pool("reading", "A1"), get_question_version(db))
+    return sorted(q["text"] for q in pool)
+
+
+def test_edit_in_one_worker_reloads_the_pool_of_another(Session):
+    db = Session()
+    db.add(Question(text="Q1", type="MULTIPLE_CHOICE", difficulty="A1", skill_category="READING",
+                    options=[QuestionOption(content="a", is_correct=True)]))
+    db.commit()
+    assert get_question_version(db) == 1
+
+    # Two workers, each with its own process-level cache
+    worker_a, worker_b = QuestionPoolCache(), QuestionPoolCache()
+    assert _pool_texts(db, worker_a) == _pool_texts(db, worker_b) == ["Q1"]
+
+    # Worker A edits the question (no add/delete, no local invalidate)
+    question = db.query(Question).one()
+    question.text = "Q1 edited"
+    question.options[0].content = "b"
+    db.commit()
+    assert get_question_version(db) == 2
+
+    assert _pool_texts(db, worker_b) == ["Q1 edited"]
+    assert worker_b.loads == 2
+
+    # Writes that do not touch questions keep the pools
+    db.add(Student(username="s", email="s@example.com", password_hash="x"))
+    db.commit()
+    assert get_question_version(db) == 2
+    assert _pool_texts(db, worker_b) == ["Q1 edited"]
+    assert worker_b.loads == 2 and worker_b.hits == 1
+    db.close()
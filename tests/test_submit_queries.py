@@ -0,0 +1,86 @@
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("EVAL_CACHE_PATH", "")
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.database import Base
+from src.models.user import Student
+from src.models.exam import Question, QuestionOption, ExamSession
+from src.schemas.exam import AnswerCreate
+from src.services.exam_service import ExamService
+from src.repositories.answer_keys import answer_key_cache
+
+# Statements issued by one /api/exam/submit (save_answers + finalize_exam) with the
+# answer keys cached; a cold cache adds the single options query
+SUBMIT_STATEMENTS = 14
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def statements(db):
+    executed = []
+    event.listen(db.get_bind(), "after_cursor_execute", lambda *args: executed.append(args[2]))
+    return executed
+
+
+def _reading_exam(db, question_count: int):
+    """Student + IN_PROGRESS reading session with multiple-choice and fill-in questions."""
+    student = Student(username="student", email="student@example.com", password_hash="x")
+    db.add(student)
+    questions = []
+    for i in range(question_count):
+        if i % 2:
+            q = Question(text=f"Fill {i}", type="FILL", difficulty="A1", skill_category="READING",
+                         options=[QuestionOption(content="Paris", is_correct=True)])
+        else:
+            q = Question(text=f"Choose {i}", type="MULTIPLE_CHOICE", difficulty="A1", skill_category="READING",
+                         options=[QuestionOption(content="a", is_correct=True), QuestionOption(content="b")])
+        questions.append(q)
+    db.add_all(questions)
+    db.flush()
+    session = ExamSession(student_id=student.user_id, status="IN_PROGRESS")
+    db.add(session)
+    db.commit()
+
+    answers = [
+        AnswerCreate(question_id=q.question_id, selected_option_id=q.options[0].option_id)
+        if q.type == "MULTIPLE_CHOICE" else
+        AnswerCreate(question_id=q.question_id, text_response=" paris ")
+        for q in questions
+    ]
+    return session.session_id, answers
+
+
+@pytest.mark.parametrize("warm_keys", [False, True])
+@pytest.mark.parametrize("question_count", [2, 6])
+def test_submit_statement_count_is_constant(db, statements, question_count, warm_keys):
+    answer_key_cache.invalidate()
+    session_id, answers = _reading_exam(db, question_count)
+    if warm_keys:
+        answer_key_cache.get_many(
+            [a.question_id for a in answers],
+            lambda missing: db.query(QuestionOption).filter(QuestionOption.question_id.in_(missing)).all()
+        )
+    db.expire_all()
+    statements.clear()
+
+    service = ExamService(db)
+    service.save_answers(session_id, answers)
+    result = service.finalize_exam(session_id, skill_name="READING")
+
+    assert result["overall_score"] == 100.0
+    assert len(statements) == SUBMIT_STATEMENTS + (not warm_keys), "\n".join(statements)